@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+
+from output_writer import atomic_open
+from parse_cache import CACHE_DIR
+
+FRAGMENT_FILE = 'card_fragments.pickle'
+
+# Bump when the card markup changes so old fragments are ignored
+FRAGMENT_VERSION = 1
+
+# Pattern to match divi cards
+CARD_PATTERN = re.compile(
+    r'<div class="divi-card(?:\s+partner)?" data-name="([^"]+)" data-categories="[^"]+"[^>]*>\s*<div class="divi-name">([^<]+)</div>\s*<div class="divi-categories">(.*?)</div>\s*</div>',
+    re.DOTALL
+)
+
+def link_cards(html, url_mapping):
+    """Wrap the name of every card in ``html`` that has a URL in a link.
+
+    Used by the generator for the linked form of each fragment and by the
+    link step of update_catalog for pages it cannot swap whole.
+    """
+    def add_link_to_card(match):
+        full_match = match.group(0)
+        name = match.group(1)
+        display_name = match.group(2)
+
+        # Find URL for this divi
+        url = url_mapping.get(name.lower(), '')
+
+        if url:
+            # Add link wrapper around the card content
+            return full_match.replace(
+                f'<div class="divi-name">{display_name}</div>',
+                f'<a href="{url}" target="_blank" class="divi-link"><div class="divi-name">{display_name}</div></a>'
+            )
+        return full_match
+
+    # Linked cards no longer match the pattern, so reruns leave them alone
+    return CARD_PATTERN.sub(add_link_to_card, html)
+
+def fragment_key(*parts):
+    """SHA-256 of the JSON form of everything a fragment shows."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _load(cache_dir):
+    if not cache_dir:
+        return {}
+    try:
+        with open(os.path.join(cache_dir, FRAGMENT_FILE), 'rb') as f:
+            data = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+    return data if data.get('version') == FRAGMENT_VERSION else {}
+
+class FragmentCache:
+    """Rendered card HTML, keyed by a hash of the card's content.
+
+    Each entry holds the card as the generated page shows it and the same
+    card with its divi link, as link_cards() makes it.
+    Only the fragments used by the latest page are saved, so the file
+    tracks the size of the catalog. With ``cache_dir=None`` nothing is read
+    or written and every card is rendered.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.fragments = _load(cache_dir).get('fragments', {})
+        self.used = {}
+        self.hits = 0
+
+    def get(self, key, render):
+        """(card html, linked card html) for ``key``, rendering it on a miss."""
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            fragment = render()
+        else:
+            self.hits += 1
+        self.used[key] = fragment
+        return fragment
+
+    def save(self, cards, linked_cards, card_urls):
+        """Keep the used fragments and the assembled grid for the link step.
+
+        ``card_urls`` lists (lowercased name, url) for every card, which the
+        link step checks against its own URL mapping before reusing
+        ``linked_cards``.
+        """
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = {
+            'version': FRAGMENT_VERSION,
+            'fragments': self.used,
+            'grid': {'cards': cards, 'linked_cards': linked_cards, 'card_urls': card_urls},
+        }
+        with atomic_open(os.path.join(self.cache_dir, FRAGMENT_FILE), mode='wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_card_grid(cache_dir=CACHE_DIR):
+    """The cards of the last generated page with and without links, or None."""
+    return _load(cache_dir).get('grid')
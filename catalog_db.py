@@ -0,0 +1,116 @@
+import sqlite3
+
+from collation import dutch_sorted
+from output_writer import atomic_path
+
+SQLITE_FILE = 'Divi_Catalogus.sqlite'
+
+SCHEMA = """
+CREATE TABLE divis (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    url TEXT,
+    is_partner INTEGER NOT NULL,
+    is_pdf INTEGER NOT NULL,
+    description TEXT
+);
+CREATE TABLE categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE divi_categories (
+    divi_id INTEGER NOT NULL REFERENCES divis(id),
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    PRIMARY KEY (divi_id, category_id)
+) WITHOUT ROWID;
+CREATE TABLE related_divis (
+    divi_id INTEGER NOT NULL REFERENCES divis(id),
+    rank INTEGER NOT NULL,
+    related_id INTEGER NOT NULL REFERENCES divis(id),
+    PRIMARY KEY (divi_id, rank)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE divis_fts USING fts5(
+    name, description,
+    content='divis', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Created after the bulk insert, which is faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX idx_divi_categories_category ON divi_categories(category_id, divi_id);
+CREATE INDEX idx_divis_name_nocase ON divis(name COLLATE NOCASE);
+CREATE INDEX idx_divis_partner ON divis(is_partner) WHERE is_partner;
+"""
+
+def _statements(script):
+    return [statement.strip() for statement in script.split(';') if statement.strip()]
+
+def generate_sqlite_catalog(records, descriptions=None, path=SQLITE_FILE):
+    """Write catalog records to a SQLite database with an FTS5 index.
+
+    ``records`` are the normalized per-divi dicts of catalog_records().
+    Tables: divis, categories and divi_categories, plus divis_fts for full
+    text search over names and descriptions, and related_divis (ranked
+    from 1) when the records list related divis. Everything is inserted in one
+    transaction into a temp file that is renamed into place, so readers
+    never see a partial database. Consumers that only read can open it with
+    ``file:Divi_Catalogus.sqlite?mode=ro&immutable=1`` (uri=True) and query
+    it concurrently without locking.
+    """
+    descriptions = descriptions or {}
+
+    divi_rows = []
+    link_rows = []
+    categories = set()
+    related = {}
+    for divi_id, record in enumerate(records, 1):
+        divi_rows.append((
+            divi_id,
+            record["name"],
+            record["url"],
+            int(record["is_partner"]),
+            int(record["is_pdf"]),
+            descriptions.get(record["name"]),
+        ))
+        for cat in record["categories"]:
+            categories.add(cat)
+            link_rows.append((divi_id, cat))
+        if record.get("related"):
+            related[divi_id] = record["related"]
+
+    # Category ids follow alphabetical order
+    category_rows = list(enumerate(dutch_sorted(categories), 1))
+    category_ids = {cat: category_id for category_id, cat in category_rows}
+    link_rows = [(divi_id, category_ids[cat]) for divi_id, cat in link_rows]
+    divi_ids = {row[1]: row[0] for row in divi_rows}
+    related_rows = [(divi_id, rank, divi_ids[name])
+                    for divi_id, names in related.items()
+                    for rank, name in enumerate(names, 1)]
+
+    with atomic_path(path) as tmp_path:
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        try:
+            # A throwaway file until the rename, so no journal is needed
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+
+            conn.execute("BEGIN")
+            for statement in _statements(SCHEMA):
+                conn.execute(statement)
+            conn.executemany("INSERT INTO divis VALUES (?, ?, ?, ?, ?, ?)", divi_rows)
+            conn.executemany("INSERT INTO categories VALUES (?, ?)", category_rows)
+            conn.executemany("INSERT INTO divi_categories VALUES (?, ?)", link_rows)
+            conn.executemany("INSERT INTO related_divis VALUES (?, ?, ?)", related_rows)
+            for statement in _statements(INDEXES):
+                conn.execute(statement)
+            conn.execute("INSERT INTO divis_fts(divis_fts) VALUES ('rebuild')")
+            conn.execute("COMMIT")
+
+            conn.execute("ANALYZE")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    print(f"Generated: {path} ({len(divi_rows)} divis, {len(category_rows)} categories)")
+    return path
@@ -0,0 +1,355 @@
+import asyncio
+import csv
+import hashlib
+import http.client
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from output_writer import atomic_open
+
+DEFAULT_BASE_URL = 'https://indiveo.nl'
+START_PATH = '/specialismen-zorg'
+THEME_PREFIX = '/themas/'
+DIVI_PREFIX = '/divis/'
+
+HTTP_CACHE_DIR = os.path.join('.divi_cache', 'http')
+USER_AGENT = 'divi-catalog-crawler/1.0'
+
+# Same columns (and the same quoting) as the browser scraper's export
+SCRAPE_FIELDS = [
+    'web_scraper_order', 'web_scraper_start_url', 'name', 'category_link', 'name_divi',
+    'divi_link', 'description_divi', 'divi_title', 'pakket_divi', 'categories_divi',
+]
+
+# The package block on a divi page starts with this line
+PAKKET_HEADING = 'Deze Divi bevat:'
+
+BLOCK_TAGS = {'p', 'div', 'li', 'ul', 'ol', 'section', 'article', 'br', 'h1', 'h2', 'h3', 'h4'}
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'nav', 'header', 'footer'}
+
+class LinkParser(HTMLParser):
+    """Collect (absolute url, link text) for every <a href> outside the site chrome."""
+
+    def __init__(self, page_url):
+        super().__init__(convert_charrefs=True)
+        self.page_url = page_url
+        self.links = []
+        self._href = None
+        self._text = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a' and not self._skip_depth:
+            href = dict(attrs).get('href')
+            self._href = urljoin(self.page_url, href) if href else None
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == 'a' and self._href is not None:
+            self.links.append((self._href, ' '.join(''.join(self._text).split())))
+            self._href = None
+
+class DiviPageParser(HTMLParser):
+    """Pull the fields of the scrape export out of a divi page.
+
+    - title: the first <h1>
+    - description: the text after the title, up to the package block
+    - pakket: the "Deze Divi bevat:" block, one item per line
+    - categories: link texts inside the element whose class mentions
+      "categor" (the tags under a divi)
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.description = []
+        self.pakket = []
+        self.categories = []
+        self._in_title = False
+        self._skip_depth = 0
+        self._section = None
+        self._category_depth = 0
+        self._open_tags = []
+        self._line = []
+
+    def _flush_line(self):
+        line = ' '.join(''.join(self._line).split())
+        self._line = []
+        if not line:
+            return
+        if line.startswith(PAKKET_HEADING):
+            self._section = 'pakket'
+            line = line[len(PAKKET_HEADING):].strip()
+            if not line:
+                return
+        if self._section == 'description':
+            self.description.append(line)
+        elif self._section == 'pakket':
+            self.pakket.append(line)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('br', 'img', 'meta', 'link', 'input', 'hr'):
+            if tag == 'br':
+                self._flush_line()
+            return
+        self._open_tags.append(tag)
+        if self._category_depth:
+            self._category_depth += 1
+        elif 'categor' in (dict(attrs).get('class') or ''):
+            self._flush_line()
+            self._category_depth = 1
+            self._section = None
+        if tag in SKIPPED_TAGS or self._skip_depth:
+            self._skip_depth += 1
+        if tag in BLOCK_TAGS:
+            self._flush_line()
+        if tag == 'h1' and not self.title:
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag not in self._open_tags:
+            return
+        # Close anything left open inside this element as well
+        while self._open_tags:
+            open_tag = self._open_tags.pop()
+            if self._skip_depth:
+                self._skip_depth -= 1
+            if self._category_depth:
+                self._category_depth -= 1
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self._flush_line()
+        if tag == 'h1' and self._in_title:
+            self._in_title = False
+            self._section = 'description'
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        elif self._category_depth:
+            for cat in data.split(','):
+                cat = ' '.join(cat.split())
+                if cat and cat not in self.categories:
+                    self.categories.append(cat)
+        else:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_line()
+
+def parse_links(html, page_url, prefix):
+    """Unique same-site links whose path starts with ``prefix``, in page order."""
+    parser = LinkParser(page_url)
+    parser.feed(html)
+    host = urlsplit(page_url).netloc
+    seen = {}
+    for url, text in parser.links:
+        parts = urlsplit(url)
+        if parts.netloc == host and parts.path.startswith(prefix) and parts.path != prefix:
+            url = parts._replace(query='', fragment='').geturl()
+            if url not in seen or not seen[url]:
+                seen[url] = text
+    return list(seen.items())
+
+def parse_divi_page(html):
+    """(title, description, pakket, categories) of a divi page, as the scraper stored them."""
+    parser = DiviPageParser()
+    parser.feed(html)
+    parser.close()
+    pakket = '\n'.join([PAKKET_HEADING] + parser.pakket) if parser.pakket else ''
+    return (' '.join(parser.title.split()), '\n\n'.join(parser.description),
+            pakket, ', '.join(parser.categories))
+
+class HttpCache:
+    """Validators and bodies of earlier responses, for conditional requests.
+
+    ``index.json`` maps a URL to its ETag / Last-Modified and the file
+    holding the body; bodies are stored under the SHA-256 of the URL.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json') if cache_dir else None
+        self.entries = {}
+        if self.index_path and os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def validators(self, url):
+        entry = self.entries.get(url)
+        if not entry or not os.path.exists(self._body_path(url)):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.html')
+
+    def load(self, url):
+        with open(self._body_path(url), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def store(self, url, body, etag, last_modified):
+        if not self.cache_dir:
+            return
+        if not (etag or last_modified):
+            self.entries.pop(url, None)
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with atomic_open(self._body_path(url), encoding='utf-8', newline='') as f:
+            f.write(body)
+        self.entries[url] = {'etag': etag, 'last_modified': last_modified}
+
+    def save(self):
+        if not self.index_path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with atomic_open(self.index_path, encoding='utf-8', newline='\n') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+            f.write('\n')
+
+class HostRateLimiter:
+    """Space out request starts to at most ``rate`` per second for each host."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class Crawler:
+    """Fetch pages with bounded concurrency, per-host rate limits and conditional requests.
+
+    Each URL is requested at most once per crawl: concurrent callers for
+    the same page share one task. The blocking urllib calls run in worker
+    threads so up to ``concurrency`` requests are in flight at a time.
+    """
+
+    def __init__(self, concurrency=8, rate=4.0, cache=None, timeout=30):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = HostRateLimiter(rate)
+        self.cache = cache or HttpCache(None)
+        self.timeout = timeout
+        self.tasks = {}
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0}
+
+    def fetch(self, url):
+        if url not in self.tasks:
+            self.tasks[url] = asyncio.ensure_future(self._fetch(url))
+        return self.tasks[url]
+
+    async def _fetch(self, url):
+        """Page body, the cached one on 304, or None if it could not be fetched."""
+        headers = {'User-Agent': USER_AGENT}
+        headers.update(self.cache.validators(url))
+        async with self.semaphore:
+            await self.limiter.wait(urlsplit(url).netloc)
+            try:
+                status, body, etag, last_modified = await asyncio.to_thread(self._request, url, headers)
+            except (urllib.error.URLError, OSError, http.client.HTTPException) as e:
+                # Refused, timed out or dropped: one page must not stop the crawl
+                status, body = None, getattr(e, 'reason', None) or e
+        if status is None or status >= 400:
+            self.stats['failed'] += 1
+            print(f"   Skipped {url} ({body if status is None else f'HTTP {status}'})")
+            return None
+        if status == 304:
+            self.stats['not_modified'] += 1
+            return self.cache.load(url)
+        self.stats['fetched'] += 1
+        self.cache.store(url, body, etag, last_modified)
+        return body
+
+    def _request(self, url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                charset = response.headers.get_content_charset() or 'utf-8'
+                body = response.read().decode(charset, errors='replace')
+                return response.status, body, response.headers.get('ETag'), response.headers.get('Last-Modified')
+        except urllib.error.HTTPError as e:
+            return e.code, None, None, None
+
+async def crawl_records(base_url=DEFAULT_BASE_URL, concurrency=8, rate=4.0, cache_dir=HTTP_CACHE_DIR):
+    """Crawl the theme index, every theme and every divi; return scrape export rows."""
+    cache = HttpCache(cache_dir)
+    crawler = Crawler(concurrency, rate, cache)
+    start_url = base_url.rstrip('/') + START_PATH
+
+    try:
+        start_page = await crawler.fetch(start_url)
+        if start_page is None:
+            print(f"Crawled nothing: the theme index {start_url} could not be fetched")
+            return []
+        themes = parse_links(start_page, start_url, THEME_PREFIX)
+        theme_pages = await asyncio.gather(*(crawler.fetch(url) for url, _ in themes))
+        theme_divis = [parse_links(html, url, DIVI_PREFIX) if html is not None else []
+                       for (url, _), html in zip(themes, theme_pages)]
+
+        # A divi listed under several themes is still fetched once
+        divi_urls = list(dict.fromkeys(url for divis in theme_divis for url, _ in divis))
+        divi_pages = dict(zip(divi_urls, await asyncio.gather(*(crawler.fetch(url) for url in divi_urls))))
+    finally:
+        # Keep the validators of whatever was fetched, even if the crawl stopped
+        cache.save()
+
+    divi_fields = {url: parse_divi_page(html) for url, html in divi_pages.items() if html is not None}
+    batch = int(time.time())
+    rows = []
+    for (theme_url, theme_name), divis in zip(themes, theme_divis):
+        for divi_url, divi_name in divis:
+            if divi_url not in divi_fields:
+                continue
+            title, description, pakket, categories = divi_fields[divi_url]
+            rows.append([
+                f"{batch}-{len(rows) + 1}", start_url, theme_name, theme_url, divi_name or title,
+                divi_url, description, title, pakket, categories,
+            ])
+
+    print(f"Crawled {len(themes)} themes and {len(divi_urls)} divis "
+          f"({crawler.stats['fetched']} fetched, {crawler.stats['not_modified']} not modified, "
+          f"{crawler.stats['failed']} failed)")
+    return rows
+
+def write_scrape_export(rows, path):
+    """Write rows in the browser scraper's CSV format (BOM, bare header, quoted fields)."""
+    with atomic_open(path, encoding='utf-8-sig', newline='') as f:
+        f.write(','.join(SCRAPE_FIELDS) + '\n')
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerows(rows)
+    print(f"Generated: {path} ({len(rows)} rows)")
+
+def crawl(output, base_url=DEFAULT_BASE_URL, concurrency=8, rate=4.0, cache_dir=HTTP_CACHE_DIR):
+    rows = asyncio.run(crawl_records(base_url, concurrency, rate, cache_dir))
+    write_scrape_export(rows, output)
+    return rows
@@ -0,0 +1,291 @@
+"""Single entry point for the Divi catalog tools.
+
+    python divi_catalog.py crawl              refresh the scrape export from indiveo.nl
+    python divi_catalog.py extract            parse the scrape export and summarize it
+    python divi_catalog.py build [--link] [--site public] [--publish public]
+                                              write all outputs (CSV, NDJSON, HTML, ...)
+    python divi_catalog.py link               refresh and link the Indiveo style page
+    python divi_catalog.py diff OLD [NEW]     compare two scrape exports
+    python divi_catalog.py serve              serve public/ on localhost
+    python divi_catalog.py budget [public]    check the public pages against size budgets
+    python divi_catalog.py bench              time the parsing and output stages
+
+Every subcommand imports only the modules it needs, and parsed inputs are
+cached in .divi_cache/ keyed by the hash of the input file, so repeated
+runs on unchanged inputs skip parsing entirely.
+"""
+import argparse
+import sys
+
+# Build options watch mode does not apply; it rebuilds the standard outputs
+# from the default inputs and relinks the style page
+WATCH_UNSUPPORTED = ('input', 'overview', 'sqlite', 'related', 'profile', 'publish', 'site', 'site_url',
+                     'budget', 'budgets')
+
+def _cache_dir(args):
+    from parse_cache import CACHE_DIR
+    return None if args.no_cache else (args.cache_dir or CACHE_DIR)
+
+def cmd_crawl(args):
+    import os
+
+    import generate_outputs as gen
+    from crawler import crawl
+
+    cache_dir = _cache_dir(args)
+    http_cache = os.path.join(cache_dir, 'http') if cache_dir else None
+    crawl(args.output or gen.SCRAPE_FILE, args.base_url, args.concurrency, args.rate, http_cache)
+    return 0
+
+def cmd_extract(args):
+    from parse_cache import load_scrape
+
+    divis, divi_urls = load_scrape(args.input, args.workers, _cache_dir(args))
+    print(f"Total divis found: {len(divis)}")
+    print(f"Total URLs found: {len(divi_urls)}")
+
+    counts = {}
+    for cats in divis.values():
+        for cat in cats:
+            counts[cat] = counts.get(cat, 0) + 1
+
+    print(f"\nTotal unique categories: {len(counts)}")
+    for cat in sorted(counts):
+        print(f"  - {cat} ({counts[cat]} divis)")
+    return 0
+
+def cmd_build(args):
+    if args.watch:
+        from watch_outputs import watch
+        watch(workers=args.workers)
+        return 0
+
+    import generate_outputs as gen
+    from parse_cache import load_descriptions, load_overview, load_scrape
+    from profiling import BuildProfiler, NullProfiler, make_build_id
+
+    scrape_path = args.input or gen.SCRAPE_FILE
+    overview_path = args.overview or gen.default_overview_path()
+    cache_dir = _cache_dir(args)
+
+    if args.profile:
+        profiler = BuildProfiler(make_build_id([scrape_path, overview_path]))
+    else:
+        profiler = NullProfiler()
+
+    print("1. Loading scraped data...")
+    with profiler.stage('extract'):
+        scraped_divis, divi_urls = load_scrape(scrape_path, args.workers, cache_dir)
+    print(f"   Found {len(scraped_divis)} divis")
+
+    print("\n2. Loading incomplete overview...")
+    with profiler.stage('overview_input'):
+        partner_divis, pdf_divis, existing_entries = load_overview(overview_path, cache_dir)
+    print(f"   Found {len(partner_divis)} Partner Divis")
+
+    descriptions = load_descriptions(scrape_path, cache_dir) if args.sqlite or args.related else None
+    category_divis = gen.build_outputs(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries,
+                                       sqlite=args.sqlite, descriptions=descriptions, profiler=profiler,
+                                       scrape_path=scrape_path, related=args.related, cache_dir=cache_dir)
+
+    if args.link:
+        cmd_link(args)
+    if args.site:
+        # Before the offline bundle, so the sitemap is in its asset manifest
+        from static_site import generate_static_site
+        generate_static_site(scraped_divis, divi_urls, category_divis, args.site, args.site_url, args.workers,
+                             cache_dir)
+    if args.publish:
+        from offline_bundle import generate_offline_bundle, publish_pages
+        publish_pages(args.publish)
+        generate_offline_bundle(args.publish)
+    if args.budget:
+        from page_budget import check_budgets
+        print()
+        if check_budgets(args.publish or 'public', args.budgets, report_dir=cache_dir):
+            return 1
+    return 0
+
+def cmd_link(args):
+    import update_catalog
+
+    link_count = update_catalog.update_catalog(cache_dir=_cache_dir(args))
+    print(f"Updated {update_catalog.STYLE_PAGE}: {link_count} linked divi cards")
+    return 0
+
+def cmd_diff(args):
+    import generate_outputs as gen
+    from parse_cache import load_scrape
+
+    cache_dir = _cache_dir(args)
+    old_divis, old_urls = load_scrape(args.old, cache_dir=cache_dir)
+    new_divis, new_urls = load_scrape(args.new or gen.SCRAPE_FILE, cache_dir=cache_dir)
+
+    added = sorted(set(new_divis) - set(old_divis))
+    removed = sorted(set(old_divis) - set(new_divis))
+    changed = sorted(name for name in set(old_divis) & set(new_divis)
+                     if old_divis[name] != new_divis[name] or old_urls.get(name) != new_urls.get(name))
+
+    for name in added:
+        print(f"+ {name}: {', '.join(sorted(new_divis[name]))}")
+    for name in removed:
+        print(f"- {name}")
+    for name in changed:
+        gained = sorted(new_divis[name] - old_divis[name])
+        lost = sorted(old_divis[name] - new_divis[name])
+        details = [f"+{cat}" for cat in gained] + [f"-{cat}" for cat in lost]
+        if old_urls.get(name) != new_urls.get(name):
+            details.append(f"url {old_urls.get(name)} -> {new_urls.get(name)}")
+        print(f"~ {name}: {'; '.join(details)}")
+
+    print(f"\n{len(added)} added, {len(removed)} removed, {len(changed)} changed")
+    return 1 if added or removed or changed else 0
+
+def cmd_serve(args):
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = partial(SimpleHTTPRequestHandler, directory=args.dir)
+    with ThreadingHTTPServer((args.host, args.port), handler) as server:
+        print(f"Serving {args.dir} on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped")
+    return 0
+
+def cmd_budget(args):
+    from page_budget import check_budgets
+
+    return 1 if check_budgets(args.dir, args.budgets, args.warn_only, _cache_dir(args), args.reset_baseline) else 0
+
+def cmd_bench(args):
+    import os
+    import tempfile
+    import time
+
+    import generate_outputs as gen
+    from parse_cache import cached_parse, load_scrape
+
+    scrape_path = os.path.abspath(args.input or gen.SCRAPE_FILE)
+    overview_path = os.path.abspath(gen.default_overview_path())
+
+    def best_of(func):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    results = [
+        ('extract (1 process)', best_of(lambda: gen.extract_divis_from_scrape(scrape_path))),
+    ]
+    if args.workers and args.workers > 1:
+        results.append((f"extract ({args.workers} processes)",
+                         best_of(lambda: gen.extract_divis_from_scrape(scrape_path, workers=args.workers))))
+    results.append(('read overview', best_of(lambda: gen.read_incomplete_overview(overview_path))))
+
+    # The generators write to the working directory, so they run in a scratch
+    # one: a benchmark leaves the outputs and the cache as they were
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            # Warm the cache once, then time the snapshot load alone
+            if _cache_dir(args):
+                cache_dir = os.path.join(scratch, 'cache')
+                load_scrape(scrape_path, cache_dir=cache_dir)
+                results.append(('extract (cached)', best_of(
+                    lambda: cached_parse('scrape', scrape_path, gen.extract_divis_from_scrape, cache_dir))))
+
+            scraped_divis, divi_urls = gen.extract_divis_from_scrape(scrape_path)
+            partner_divis, pdf_divis, existing_entries = gen.read_incomplete_overview(overview_path)
+            category_divis = gen.generate_creative_catalog(scraped_divis, partner_divis)
+            results.append(('html catalog', best_of(
+                lambda: gen.generate_html_catalog(scraped_divis, partner_divis, category_divis))))
+        finally:
+            os.chdir(cwd)
+
+    print(f"\nBest of {args.repeat} runs on {scrape_path}:")
+    for name, seconds in results:
+        print(f"  {name:<28} {seconds * 1000:9.1f} ms")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indiveo Divi catalog tools.")
+    parser.add_argument('--cache-dir', default=None,
+                        help="directory for parsed input snapshots (default: .divi_cache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always parse the inputs, ignoring the cache")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('crawl', help="refresh the scrape export from indiveo.nl")
+    p.add_argument('--base-url', default='https://indiveo.nl',
+                   help="site to crawl, e.g. a local fixture server (default: https://indiveo.nl)")
+    p.add_argument('--output', help="scrape export to write (default: Indiveo (1).csv)")
+    p.add_argument('--concurrency', type=int, default=8, help="requests in flight at once")
+    p.add_argument('--rate', type=float, default=4.0, help="requests per second per host (0: unlimited)")
+    p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser('extract', help="parse the scrape export and summarize it")
+    p.add_argument('--input', help="scrape export (default: Indiveo (1).csv)")
+    p.add_argument('--workers', type=int, default=None)
+    p.set_defaults(func=cmd_extract)
+
+    p = build_parser = sub.add_parser('build', help="write all catalog outputs")
+    p.add_argument('--input', help="scrape export (default: Indiveo (1).csv)")
+    p.add_argument('--overview', help="Divitheek workbook or CSV export")
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--sqlite', action='store_true', help="also write the SQLite catalog")
+    p.add_argument('--related', action='store_true', help="list related divis (needs numpy and scipy)")
+    p.add_argument('--profile', action='store_true', help="profile every stage")
+    p.add_argument('--link', action='store_true', help="run the link step afterwards")
+    p.add_argument('--publish', metavar='DIR',
+                   help="copy the pages into DIR and write its service worker and asset manifest")
+    p.add_argument('--site', metavar='DIR',
+                   help="write a static page per divi and per category and a sitemap into DIR")
+    p.add_argument('--site-url', help="public URL of the site; the sitemap is only written with it")
+    p.add_argument('--budget', action='store_true',
+                   help="check the published pages against their size budgets afterwards")
+    p.add_argument('--budgets', help="JSON file with budget overrides")
+    p.add_argument('--watch', action='store_true', help="keep rebuilding when the inputs change")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser('link', help="refresh and link the Indiveo style page")
+    p.set_defaults(func=cmd_link)
+
+    p = sub.add_parser('diff', help="compare two scrape exports")
+    p.add_argument('old')
+    p.add_argument('new', nargs='?')
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser('serve', help="serve the public catalog locally")
+    p.add_argument('--dir', default='public')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8000)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('budget', help="check the public pages against size budgets")
+    p.add_argument('dir', nargs='?', default='public')
+    p.add_argument('--budgets', help="JSON file with budget overrides")
+    p.add_argument('--warn-only', action='store_true', help="report pages over budget without failing")
+    p.add_argument('--reset-baseline', action='store_true', help="take the current sizes as the new baseline")
+    p.set_defaults(func=cmd_budget)
+
+    p = sub.add_parser('bench', help="time the parsing and output stages")
+    p.add_argument('--input', help="scrape export (default: Indiveo (1).csv)")
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--repeat', type=int, default=5)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    if args.command == 'build' and args.watch:
+        ignored = [f"--{name.replace('_', '-')}" for name in WATCH_UNSUPPORTED if getattr(args, name)]
+        if ignored:
+            build_parser.error(f"--watch cannot be combined with {', '.join(ignored)}")
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
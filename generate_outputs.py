@@ -1,6 +1,45 @@
+import argparse
 import csv
+import json
+import mmap
+import os
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from card_fragments import FragmentCache, fragment_key, link_cards
+from catalog_db import SQLITE_FILE, generate_sqlite_catalog
+from collation import dutch_sorted
+from output_writer import atomic_open
+from parse_cache import CACHE_DIR
+from profiling import PROFILE_DIR, BuildProfiler, NullProfiler, make_build_id
+from xlsx_reader import iter_xlsx_rows
+
+SCRAPE_FILE = 'Indiveo (1).csv'
+WORKBOOK_FILE = "Overzicht Divi's in Divitheek.xlsx"
+OVERVIEW_FILE = "Overzicht Divi's in Divitheek.xlsx - Worksheet.csv"
+JSON_EXPORT_FILE = 'Catalogus.ndjson'
+
+# Neighbours listed per divi by the related divis stage
+RELATED_DIVIS = 5
+
+# Every scrape record starts with a web_scraper_order id like "1765314254-1"
+RECORD_START = re.compile(rb'"\d{10}-\d+"')
+
+# The theme link is followed by the divi name and the divi link. Any host
+# matches, so an export crawled from a local copy of the site parses too.
+DIVI_LINK = re.compile(rb'https?://[^"/]+/themas/[^"]+","([^"]+)","(https?://[^"/]+/divis/[^"]+)"')
+QUOTED_FIELD = re.compile(rb'"([^"]*)"')
+DESCRIPTION_FIELD = re.compile(rb',"([^"]*)"')
+
+# Quoted fields that are never the category list (descriptions, package, URLs)
+SKIP_PREFIXES = (b'Deze Divi', b'Animatie', b'B1 ', b'Begrijpelijke', b'http')
+SKIP_PREFIX_LENGTH = max(len(p) for p in SKIP_PREFIXES)
+
+# The ASCII characters str.strip() removes
+WHITESPACE_BYTES = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
 
 # Valid categories from the scraped data and incomplete overview
 VALID_CATEGORIES = {
@@ -23,6 +62,7 @@ VALID_CATEGORIES = {
     "KNO",
     "Kindergeneeskunde",
     "Longgeneeskunde",
+    "Longkanker",
     "Longziekten",
     "Maag-darm-leverziekten",
     "Mond-, kaak- en aangezichtschirurgie",
@@ -54,128 +94,360 @@ CATEGORY_NORMALIZATION = {
     "Psychologie & Psychiatrie": "Psychiatrie",
 }
 
+# (is_partner, is_pdf, is_category) for the marker values of the Divitheek sheet
+CELL_FLAGS = {
+    'Partner Divi': (True, False, False),
+    'PDF': (False, True, False),
+    'PDF, Partner Divi': (True, True, False),
+}
+_cell_flag_cache = dict(CELL_FLAGS)
+
 def normalize_category(cat):
     """Normalize a category name to match the original format."""
     cat = cat.strip()
     return CATEGORY_NORMALIZATION.get(cat, cat)
 
-def extract_divis_from_scrape():
-    """Extract divi names, their categories, and URLs from the scraped CSV."""
+def _category_trie(names):
+    """Character trie over the lowercased names; key None holds the normalized category."""
+    root = {}
+    for name in names:
+        node = root
+        for ch in name.lower():
+            node = node.setdefault(ch, {})
+        node[None] = normalize_category(name)
+    return root
+
+CATEGORY_TRIE = _category_trie(VALID_CATEGORIES | CATEGORY_NORMALIZATION.keys())
+_category_field_cache = {}
+
+def tokenize_categories(field):
+    """Split a categories field into (known categories, unknown tokens).
+
+    One left-to-right pass: from each token start the trie is walked as far
+    as the text matches, and the longest category that ends at a comma or
+    the end of the field wins, so names containing a comma ("Mond-, kaak-
+    en aangezichtschirurgie") need no special case. Text that matches no
+    category runs to the next comma and is returned as unknown.
+    """
+    result = _category_field_cache.get(field)
+    if result is not None:
+        return result
+
+    categories = []
+    unknown = []
+    n = len(field)
+    i = 0
+    while i < n:
+        if field[i] == ',' or field[i].isspace():
+            i += 1
+            continue
+        node = CATEGORY_TRIE
+        match = None
+        j = i
+        while j < n:
+            node = node.get(field[j].lower())
+            if node is None:
+                break
+            j += 1
+            if None in node:
+                k = j
+                while k < n and field[k].isspace():
+                    k += 1
+                if k == n or field[k] == ',':
+                    match = (node[None], k)
+        if match:
+            categories.append(match[0])
+            i = match[1]
+        else:
+            end = field.find(',', i)
+            if end < 0:
+                end = n
+            unknown.append(field[i:end].strip())
+            i = end
+
+    result = _category_field_cache[field] = (categories, unknown)
+    return result
+
+def _strip_span(buf, start, end):
+    """Trim whitespace from a UTF-8 byte span as str.strip() would.
+
+    ASCII whitespace is skipped without copying. For Unicode whitespace
+    such as a no-break space only the one character at each edge is
+    decoded, so a long description span is never copied.
+    """
+    while start < end:
+        if buf[start] in WHITESPACE_BYTES:
+            start += 1
+            continue
+        lead = buf[start]
+        # A lead byte gives the length of its character; no whitespace needs four bytes
+        n = 2 if 0xC0 <= lead < 0xE0 else 3 if 0xE0 <= lead < 0xF0 else 0
+        if n and buf[start:start + n].decode('utf-8', errors='replace').isspace():
+            start += n
+            continue
+        break
+    while end > start:
+        if buf[end - 1] in WHITESPACE_BYTES:
+            end -= 1
+            continue
+        # Step back over continuation bytes to the start of the last character
+        char_start = end - 1
+        while char_start > max(start, end - 3) and 0x80 <= buf[char_start] < 0xC0:
+            char_start -= 1
+        if buf[end - 1] >= 0x80 and buf[char_start:end].decode('utf-8', errors='replace').isspace():
+            end = char_start
+            continue
+        break
+    return start, end
+
+def _utf8_length(buf, start, end):
+    """Number of characters in a UTF-8 byte span, without decoding it."""
+    length = end - start
+    # Every character is at least one byte and at most four
+    if length <= 150 or length > 600:
+        return length
+    return len(buf[start:end].translate(None, UTF8_CONTINUATION_BYTES))
+
+def _record_spans(buf, start, end):
+    """Byte spans of the records in buf[start:end], each without its order id."""
+    # Record content runs from the end of one order id to the next
+    ids = [m.span() for m in RECORD_START.finditer(buf, start, end)]
+    record_ends = [id_start for id_start, id_end in ids[1:]] + [end]
+    return [(record_start, record_end) for (id_start, record_start), record_end in zip(ids, record_ends)]
+
+def _parse_scrape_records(buf, start=0, end=None):
+    """Parse divi names, categories and URLs from the records in buf[start:end].
+
+    ``buf`` is the raw UTF-8 scrape export (usually a memory map). Only the
+    fields that are kept are decoded; descriptions stay bytes in the map.
+    Returns the divis, their URLs and the set of (divi, unknown category
+    token) pairs, which the caller reports.
+    """
+    if end is None:
+        end = len(buf)
+
     divis = {}
     divi_urls = {}
+    unknown_tokens = set()
 
-    with open('Indiveo (1).csv', 'r', encoding='utf-8-sig') as f:
-        content = f.read()
-
-    records = re.split(r'"(\d{10}-\d+)"', content)
-
-    for i in range(2, len(records), 2):
-        record_content = records[i] if i < len(records) else ""
-        record_content = record_content.strip()
-        if not record_content:
-            continue
-
-        divi_match = re.search(
-            r'https://indiveo\.nl/themas/[^"]+","([^"]+)","(https://indiveo\.nl/divis/[^"]+)"',
-            record_content
-        )
+    for record_start, record_end in _record_spans(buf, start, end):
+        divi_match = DIVI_LINK.search(buf, record_start, record_end)
 
         if not divi_match:
             continue
 
-        divi_name = divi_match.group(1).strip()
-        divi_url = divi_match.group(2).strip()
+        divi_name = divi_match.group(1).decode('utf-8').strip()
+        divi_url = divi_match.group(2).decode('utf-8').strip()
+        name_bytes = divi_name.encode('utf-8')
 
         # Store the URL
         divi_urls[divi_name] = divi_url
 
-        all_quotes = re.findall(r'"([^"]*)"', record_content)
+        all_quotes = [m.span(1) for m in QUOTED_FIELD.finditer(buf, record_start, record_end)]
 
         categories_str = None
-        for q in reversed(all_quotes):
-            q = q.strip()
-            if q.startswith('Deze Divi') or q.startswith('Animatie') or q.startswith('B1 ') or q.startswith('Begrijpelijke'):
-                continue
-            if q.startswith('http'):
+        for q_start, q_end in reversed(all_quotes):
+            q_start, q_end = _strip_span(buf, q_start, q_end)
+            if q_start == q_end:
                 continue
-            if not q:
+            if buf[q_start:q_start + SKIP_PREFIX_LENGTH].startswith(SKIP_PREFIXES):
                 continue
-            if len(q) > 150:
+            if _utf8_length(buf, q_start, q_end) > 150:
                 continue
-            if q == divi_name:
+            q = buf[q_start:q_end]
+            if q == name_bytes:
                 continue
-            categories_str = q
+            categories_str = q.decode('utf-8')
             break
 
         if divi_name and categories_str:
-            if divi_name not in divis:
-                divis[divi_name] = set()
-
-            if "Mond-" in categories_str and "kaak- en aangezichtschirurgie" in categories_str:
-                categories_str = categories_str.replace("Mond-, kaak- en aangezichtschirurgie", "MKAC_PLACEHOLDER")
-
-            for cat in categories_str.split(','):
-                cat = cat.strip()
-                if cat == "MKAC_PLACEHOLDER":
-                    cat = "Mond-, kaak- en aangezichtschirurgie"
-
-                cat = normalize_category(cat)
+            categories, unknown = tokenize_categories(categories_str)
+            # A divi with only unknown categories gets no entry
+            if categories:
+                if divi_name not in divis:
+                    divis[divi_name] = set()
+                divis[divi_name].update(categories)
+            unknown_tokens.update((divi_name, token) for token in unknown)
+
+    return divis, divi_urls, unknown_tokens
+
+def _report_unknown(unknown_tokens):
+    """Print every skipped category once, in a stable order."""
+    # A divi listed under several themes repeats its categories
+    for divi_name, token in sorted(unknown_tokens):
+        print(f"   Skipped unknown category {token!r} of {divi_name}")
+
+@contextmanager
+def _map_scrape_file(path):
+    """Memory-map the scrape export read-only (empty files map to b'')."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+def _parse_scrape_chunk(path, start, end):
+    """Parse the records between two byte offsets of the scrape file."""
+    with _map_scrape_file(path) as buf:
+        return _parse_scrape_records(buf, start, end)
+
+def _scrape_chunk_bounds(path, n_chunks):
+    """Split the scrape file into byte ranges that each start at a record."""
+    with _map_scrape_file(path) as buf:
+        size = len(buf)
+        first = RECORD_START.search(buf)
+        if not first:
+            return []
+
+        # Cut at the first record start past each evenly spaced target offset
+        bounds = [first.start()]
+        for k in range(1, n_chunks):
+            target = first.start() + (size - first.start()) * k // n_chunks
+            if target <= bounds[-1]:
+                continue
+            m = RECORD_START.search(buf, target)
+            if not m:
+                break
+            if m.start() > bounds[-1]:
+                bounds.append(m.start())
+        bounds.append(size)
 
-                if cat and (cat in VALID_CATEGORIES or any(valid.lower() == cat.lower() for valid in VALID_CATEGORIES)):
-                    divis[divi_name].add(cat)
-                elif cat and len(cat) < 50 and cat != divi_name:
-                    divis[divi_name].add(cat)
+    return list(zip(bounds[:-1], bounds[1:]))
 
+def _merge_scrape_results(results):
+    """Merge per-chunk divi/URL maps and unknown tokens in file order."""
+    divis = {}
+    divi_urls = {}
+    unknown_tokens = set()
+    for chunk_divis, chunk_urls, chunk_unknown in results:
+        for divi_name, cats in chunk_divis.items():
+            if divi_name not in divis:
+                divis[divi_name] = set()
+            divis[divi_name].update(cats)
+        # Later records win, exactly as in a single pass over the file
+        divi_urls.update(chunk_urls)
+        unknown_tokens.update(chunk_unknown)
+    return divis, divi_urls, unknown_tokens
+
+def extract_divis_from_scrape(path=SCRAPE_FILE, workers=None):
+    """Extract divi names, their categories, and URLs from the scraped CSV.
+
+    The export is memory-mapped and scanned as bytes. With ``workers`` > 1
+    the file is split at record boundaries and the chunks are parsed in a
+    process pool; the merged result is identical to the single-process one.
+    Category tokens that match no known category are reported once, sorted.
+    """
+    # A few chunks per worker keeps the pool busy when records vary in size
+    bounds = _scrape_chunk_bounds(path, workers * 4) if workers and workers > 1 else []
+
+    if len(bounds) <= 1:
+        with _map_scrape_file(path) as buf:
+            divis, divi_urls, unknown_tokens = _parse_scrape_records(buf)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_parse_scrape_chunk, [path] * len(bounds),
+                               [start for start, end in bounds],
+                               [end for start, end in bounds])
+            divis, divi_urls, unknown_tokens = _merge_scrape_results(results)
+
+    _report_unknown(unknown_tokens)
     return divis, divi_urls
 
-def read_incomplete_overview():
-    """Read the incomplete overview to identify Partner Divi's and existing entries."""
+def _classify_cell(cell):
+    """(is_partner, is_pdf, is_category) for a stripped worksheet cell, looked up once per value."""
+    flags = _cell_flag_cache.get(cell)
+    if flags is None:
+        flags = (
+            'Partner Divi' in cell,
+            ('PDF' in cell and 'Partner' not in cell) or 'PDF, Partner Divi' in cell,
+            True,
+        )
+        _cell_flag_cache[cell] = flags
+    return flags
+
+def default_overview_path():
+    """The Divitheek workbook if it is present, otherwise its CSV export."""
+    return WORKBOOK_FILE if os.path.exists(WORKBOOK_FILE) else OVERVIEW_FILE
+
+def _iter_overview_rows(path):
+    if path.lower().endswith('.xlsx'):
+        yield from iter_xlsx_rows(path)
+        return
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+def extract_divi_descriptions(path=SCRAPE_FILE):
+    """Map each divi name to its description_divi text from the scraped CSV.
+
+    A separate pass, so the main extraction never has to decode descriptions.
+    """
+    descriptions = {}
+    with _map_scrape_file(path) as buf:
+        for record_start, record_end in _record_spans(buf, 0, len(buf)):
+            divi_match = DIVI_LINK.search(buf, record_start, record_end)
+            if not divi_match:
+                continue
+            divi_name = divi_match.group(1).decode('utf-8').strip()
+            if descriptions.get(divi_name):
+                continue
+            # description_divi is the field right after divi_link
+            description = DESCRIPTION_FIELD.match(buf, divi_match.end(), record_end)
+            if description:
+                descriptions[divi_name] = description.group(1).decode('utf-8').strip()
+    return descriptions
+
+def read_incomplete_overview(path=None):
+    """Read the incomplete overview to identify Partner Divi's and existing entries.
+
+    ``path`` may be the Divitheek .xlsx workbook (streamed row by row) or its
+    CSV export; by default the workbook is used when it exists.
+    """
     partner_divis = set()
     pdf_divis = set()
     existing_entries = {}
 
-    with open("Overzicht Divi's in Divitheek.xlsx - Worksheet.csv", 'r', encoding='utf-8-sig') as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if not row or not row[0] or row[0] == 'Divi':
-                continue
+    for row in _iter_overview_rows(path or default_overview_path()):
+        if not row or not row[0] or row[0] == 'Divi':
+            continue
 
-            divi_name = row[0].strip()
-            categories = []
-
-            for cell in row[1:]:
-                cell = cell.strip()
-                if cell and cell != '-':
-                    if 'Partner Divi' in cell:
-                        partner_divis.add(divi_name)
-                    if 'PDF' in cell and 'Partner' not in cell:
-                        pdf_divis.add(divi_name)
-                    elif 'PDF, Partner Divi' in cell:
-                        pdf_divis.add(divi_name)
-                        partner_divis.add(divi_name)
-                    # Check if it's a regular category
-                    if cell not in ['Partner Divi', 'PDF', 'PDF, Partner Divi']:
-                        categories.append(cell)
-
-            existing_entries[divi_name] = categories
+        divi_name = row[0].strip()
+        categories = []
+
+        for cell in row[1:]:
+            cell = cell.strip()
+            if cell and cell != '-':
+                is_partner, is_pdf, is_category = _classify_cell(cell)
+                if is_partner:
+                    partner_divis.add(divi_name)
+                if is_pdf:
+                    pdf_divis.add(divi_name)
+                # Check if it's a regular category
+                if is_category:
+                    categories.append(cell)
+
+        existing_entries[divi_name] = categories
 
     return partner_divis, pdf_divis, existing_entries
 
+def divi_categories(divi_name, scraped_divis, existing_entries):
+    """Sorted categories of a divi: scraped ones, else those from the existing overview."""
+    cats = list(scraped_divis.get(divi_name, set()))
+
+    # If no scraped categories, use existing
+    if not cats and divi_name in existing_entries:
+        cats = existing_entries[divi_name]
+
+    return dutch_sorted(cats)
+
 def generate_completed_overview(scraped_divis, partner_divis, pdf_divis, existing_entries):
     """Generate the completed overview CSV with the same structure."""
     all_divis = set(scraped_divis.keys()) | set(existing_entries.keys())
 
     rows = []
-    for divi_name in sorted(all_divis):
-        # Get categories from scraped data
-        scraped_cats = list(scraped_divis.get(divi_name, set()))
-
-        # If no scraped categories, use existing
-        if not scraped_cats and divi_name in existing_entries:
-            scraped_cats = existing_entries[divi_name]
-
-        # Sort categories
-        scraped_cats = sorted(scraped_cats)
+    for divi_name in dutch_sorted(all_divis):
+        # Get categories from scraped data, falling back to the existing entry
+        scraped_cats = divi_categories(divi_name, scraped_divis, existing_entries)
 
         # Build the row - now with up to 10 columns like the original
         row = [divi_name]
@@ -223,7 +495,7 @@ def generate_completed_overview(scraped_divis, partner_divis, pdf_divis, existin
             row.append("")
 
     # Write to CSV
-    with open('Compleet_Overzicht_Divis.csv', 'w', encoding='utf-8-sig', newline='') as f:
+    with atomic_open('Compleet_Overzicht_Divis.csv', encoding='utf-8-sig', newline='') as f:
         writer = csv.writer(f)
         # Header
         header = ['Divi'] + ['Type'] * (max_cols - 1)
@@ -238,16 +510,9 @@ def generate_completed_overview_v2(scraped_divis, divi_urls, partner_divis, pdf_
     all_divis = set(scraped_divis.keys()) | set(existing_entries.keys())
 
     rows = []
-    for divi_name in sorted(all_divis):
-        # Get categories from scraped data
-        scraped_cats = list(scraped_divis.get(divi_name, set()))
-
-        # If no scraped categories, use existing
-        if not scraped_cats and divi_name in existing_entries:
-            scraped_cats = existing_entries[divi_name]
-
-        # Sort categories
-        scraped_cats = sorted(scraped_cats)
+    for divi_name in dutch_sorted(all_divis):
+        # Get categories from scraped data, falling back to the existing entry
+        scraped_cats = divi_categories(divi_name, scraped_divis, existing_entries)
 
         # Get URL
         url = divi_urls.get(divi_name, "")
@@ -297,7 +562,7 @@ def generate_completed_overview_v2(scraped_divis, divi_urls, partner_divis, pdf_
         final_rows.append(row)
 
     # Write to CSV
-    with open('Compleet_Overzicht_Divis_v2.csv', 'w', encoding='utf-8-sig', newline='') as f:
+    with atomic_open('Compleet_Overzicht_Divis_v2.csv', encoding='utf-8-sig', newline='') as f:
         writer = csv.writer(f)
         # Header
         header = ['Divi'] + ['Type'] * (max_cols - 1) + ['URL']
@@ -326,8 +591,8 @@ def generate_creative_catalog(scraped_divis, partner_divis):
     rows = []
     rows.append(["Categorie", "Aantal Divi's", "Divi Namen"])
 
-    for cat in sorted(category_divis.keys()):
-        divi_list = sorted(category_divis[cat], key=lambda x: x["name"])
+    for cat in dutch_sorted(category_divis.keys()):
+        divi_list = dutch_sorted(category_divis[cat], key=lambda x: x["name"])
         divi_names = []
         for d in divi_list:
             name = d["name"]
@@ -336,7 +601,7 @@ def generate_creative_catalog(scraped_divis, partner_divis):
             divi_names.append(name)
         rows.append([cat, len(divi_list), ", ".join(divi_names)])
 
-    with open('Catalogus_Per_Categorie.csv', 'w', encoding='utf-8-sig', newline='') as f:
+    with atomic_open('Catalogus_Per_Categorie.csv', encoding='utf-8-sig', newline='') as f:
         writer = csv.writer(f)
         writer.writerows(rows)
 
@@ -346,17 +611,17 @@ def generate_creative_catalog(scraped_divis, partner_divis):
     detail_rows = []
     detail_rows.append(["Divi Naam", "Categorieën", "Is Partner Divi"])
 
-    for divi_name in sorted(scraped_divis.keys()):
-        cats = sorted(scraped_divis[divi_name])
+    for divi_name in dutch_sorted(scraped_divis.keys()):
+        cats = dutch_sorted(scraped_divis[divi_name])
         is_partner = "Ja" if divi_name in partner_divis else "Nee"
         detail_rows.append([divi_name, ", ".join(cats), is_partner])
 
     # Add partner divis not in scraped data
-    for divi_name in sorted(partner_divis):
+    for divi_name in dutch_sorted(partner_divis):
         if divi_name not in scraped_divis:
             detail_rows.append([divi_name, "Partner Divi", "Ja"])
 
-    with open('Catalogus_Detail.csv', 'w', encoding='utf-8-sig', newline='') as f:
+    with atomic_open('Catalogus_Detail.csv', encoding='utf-8-sig', newline='') as f:
         writer = csv.writer(f)
         writer.writerows(detail_rows)
 
@@ -364,10 +629,142 @@ def generate_creative_catalog(scraped_divis, partner_divis):
 
     return category_divis
 
-def generate_html_catalog(scraped_divis, partner_divis, category_divis):
-    """Generate an interactive HTML catalog."""
-    # Get all categories
-    all_categories = sorted(category_divis.keys())
+def catalog_records(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries, related=None):
+    """Yield one normalized record per divi, in Dutch alphabetical order.
+
+    With ``related`` (see find_related_divis()) every record also lists the
+    names of its related divis, most similar first.
+    """
+    all_divis = set(scraped_divis.keys()) | set(existing_entries.keys())
+
+    for divi_name in dutch_sorted(all_divis):
+        record = {
+            "name": divi_name,
+            "categories": divi_categories(divi_name, scraped_divis, existing_entries),
+            "url": divi_urls.get(divi_name) or None,
+            "is_partner": divi_name in partner_divis,
+            "is_pdf": divi_name in pdf_divis,
+        }
+        if related is not None:
+            record["related"] = related.get(divi_name, [])
+        yield record
+
+def find_related_divis(scraped_divis, existing_entries, descriptions, k=RELATED_DIVIS):
+    """Map every catalog divi to its ``k`` most similar divis (needs numpy and scipy).
+
+    Similarity combines shared categories and shared description terms; see
+    related_divis.py.
+    """
+    try:
+        from related_divis import related_divis
+    except ImportError as e:
+        raise SystemExit(f"Related divis need numpy and scipy ({e})")
+
+    names = dutch_sorted(set(scraped_divis.keys()) | set(existing_entries.keys()))
+    categories = [divi_categories(name, scraped_divis, existing_entries) for name in names]
+    return related_divis(names, categories, [descriptions.get(name, '') for name in names], k)
+
+def generate_json_export(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries, related=None):
+    """Stream the normalized catalog as NDJSON, one JSON object per divi.
+
+    Unlike Catalogus_Detail.csv, categories are a real array, so names that
+    contain a comma ("Mond-, kaak- en aangezichtschirurgie") stay intact.
+    Consumers can read the file line by line without loading it whole.
+    """
+    count = 0
+    with atomic_open(JSON_EXPORT_FILE, encoding='utf-8', newline='\n') as f:
+        for record in catalog_records(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries, related):
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+
+    print(f"Generated: {JSON_EXPORT_FILE} ({count} records)")
+    return count
+
+def category_facets(category_divis):
+    """Category ids per divi and the category co-occurrence matrix.
+
+    Ids index the category list in Dutch collation order. ``cooccurrence[i][j]`` is the number
+    of divis in both category i and j; the diagonal holds the category sizes.
+    """
+    all_categories = dutch_sorted(category_divis.keys())
+    cat_ids = {cat: i for i, cat in enumerate(all_categories)}
+
+    divi_cat_ids = defaultdict(list)
+    for cat in all_categories:
+        for info in category_divis[cat]:
+            divi_cat_ids[info["name"]].append(cat_ids[cat])
+
+    cooccurrence = [[0] * len(all_categories) for _ in all_categories]
+    for ids in divi_cat_ids.values():
+        for i in ids:
+            row = cooccurrence[i]
+            for j in ids:
+                row[j] += 1
+
+    return all_categories, divi_cat_ids, cooccurrence
+
+def render_divi_card(divi_name, cats, url, is_partner, cat_ids, related_positions):
+    """(card html, card html with the divi link) for one card of the catalog page.
+
+    ``cats`` is None for a partner divi that is not in the scraped data. The
+    linked form is what the link step of update_catalog makes of the card.
+    """
+    cat_ids = " ".join(str(i) for i in cat_ids)
+    related_attr = f' data-related="{" ".join(str(i) for i in related_positions)}"' if related_positions else ''
+
+    if cats is None:
+        card = f'                <div class="divi-card partner" data-name="{divi_name.lower()}" data-categories="partner divi" data-cat-ids="{cat_ids}"{related_attr}>\n'
+        card += f'                    <div class="divi-name">{divi_name}</div>\n'
+        card += '                    <div class="divi-categories">\n'
+        card += '                        <span class="partner-badge">Partner Divi</span>\n'
+        card += '                    </div>\n'
+        card += '                </div>\n'
+    else:
+        card_class = "divi-card partner" if is_partner else "divi-card"
+        cats_str = ",".join(cats)
+
+        card = f'                <div class="{card_class}" data-name="{divi_name.lower()}" data-categories="{cats_str.lower()}" data-cat-ids="{cat_ids}"{related_attr}>\n'
+        card += f'                    <div class="divi-name">{divi_name}</div>\n'
+        card += '                    <div class="divi-categories">\n'
+
+        for cat in cats:
+            card += f'                        <span class="divi-cat">{cat}</span>\n'
+
+        if is_partner:
+            card += '                        <span class="partner-badge">Partner Divi</span>\n'
+
+        card += '                    </div>\n'
+        card += '                </div>\n'
+
+    linked = link_cards(card, {divi_name.lower(): url}) if url else card
+    return card, linked
+
+def generate_html_catalog(scraped_divis, partner_divis, category_divis, related=None, divi_urls=None, cache_dir=None):
+    """Generate an interactive HTML catalog.
+
+    With ``related`` every card lists the positions of its related cards in
+    data-related, and clicking the card shows them. Cards come from the
+    fragment cache in ``cache_dir`` when their content is unchanged; the
+    cache also keeps the linked cards for update_catalog.
+    """
+    # Get all categories, with the ids and co-occurrence used for live counts
+    all_categories, divi_cat_ids, cooccurrence = category_facets(category_divis)
+
+    # Cards are in Dutch alphabetical order; the other orders the page offers
+    # are lists of card positions, sorted here so the browser never sorts
+    card_names = dutch_sorted(set(scraped_divis) | set(partner_divis))
+    card_positions = {name: i for i, name in enumerate(card_names)}
+    positions = range(len(card_names))
+    orders = {
+        "naam": list(positions),
+        # Category ids follow the same collation, so the lowest id is the first category
+        "categorie": sorted(positions, key=lambda i: (min(divi_cat_ids[card_names[i]], default=len(all_categories)), i)),
+        "partner": sorted(positions, key=lambda i: (card_names[i] not in partner_divis, i)),
+    }
+
+    catalog_data = json.dumps({"categories": all_categories, "cooccurrence": cooccurrence, "orders": orders},
+                              ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
 
     html = '''<!DOCTYPE html>
 <html lang="nl">
@@ -488,6 +885,35 @@ def generate_html_catalog(scraped_divis, partner_divis, category_divis):
             border-radius: 10px;
             margin-left: 5px;
         }
+        .category-tag.empty {
+            opacity: 0.4;
+        }
+        .divi-card[data-related] {
+            cursor: pointer;
+        }
+        .divi-card.highlight {
+            box-shadow: 0 0 0 3px #667eea;
+        }
+        .divi-related {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 6px;
+            margin-top: 12px;
+        }
+        .related-label {
+            width: 100%;
+            font-size: 0.8em;
+            color: #999;
+        }
+        .related-divi {
+            background: #eef0fd;
+            color: #667eea;
+            border: none;
+            padding: 4px 10px;
+            border-radius: 12px;
+            font-size: 0.8em;
+            cursor: pointer;
+        }
         .results {
             margin-top: 20px;
         }
@@ -599,6 +1025,11 @@ def generate_html_catalog(scraped_divis, partner_divis, category_divis):
         html += f'                    <option value="{cat}">{cat} ({count})</option>\n'
 
     html += '''                </select>
+                <select class="category-filter" id="sortSelect">
+                    <option value="naam">Sorteer op naam</option>
+                    <option value="categorie">Sorteer op categorie</option>
+                    <option value="partner">Partner Divi's eerst</option>
+                </select>
             </div>
             <div class="category-tags" id="categoryTags">
 '''
@@ -616,35 +1047,34 @@ def generate_html_catalog(scraped_divis, partner_divis, category_divis):
             <div class="divi-grid" id="diviGrid">
 '''
 
-    # Add divi cards
-    for divi_name in sorted(scraped_divis.keys()):
-        cats = sorted(scraped_divis[divi_name])
+    def related_positions(divi_name):
+        if not related:
+            return []
+        return [card_positions[name] for name in related.get(divi_name, []) if name in card_positions]
+
+    # A card is rendered only when something it shows changed
+    fragments = FragmentCache(cache_dir)
+    cards = []
+    linked_cards = []
+    card_urls = []
+    for divi_name in card_names:
+        is_scraped = divi_name in scraped_divis
+        cats = dutch_sorted(scraped_divis[divi_name]) if is_scraped else None
         is_partner = divi_name in partner_divis
-        card_class = "divi-card partner" if is_partner else "divi-card"
-        cats_str = ",".join(cats)
-
-        html += f'                <div class="{card_class}" data-name="{divi_name.lower()}" data-categories="{cats_str.lower()}">\n'
-        html += f'                    <div class="divi-name">{divi_name}</div>\n'
-        html += '                    <div class="divi-categories">\n'
-
-        for cat in cats:
-            html += f'                        <span class="divi-cat">{cat}</span>\n'
+        url = (divi_urls or {}).get(divi_name, '')
+        url = url if url.startswith('http') else ''
+        positions = related_positions(divi_name)
+        key = fragment_key(divi_name, cats, url, is_partner, divi_cat_ids[divi_name], positions)
 
-        if is_partner:
-            html += '                        <span class="partner-badge">Partner Divi</span>\n'
-
-        html += '                    </div>\n'
-        html += '                </div>\n'
+        card, linked = fragments.get(key, lambda: render_divi_card(
+            divi_name, cats, url, is_partner, divi_cat_ids[divi_name], positions))
+        cards.append(card)
+        linked_cards.append(linked)
+        card_urls.append((divi_name.lower(), url))
 
-    # Add partner divis not in scraped data
-    for divi_name in sorted(partner_divis):
-        if divi_name not in scraped_divis:
-            html += f'                <div class="divi-card partner" data-name="{divi_name.lower()}" data-categories="partner divi">\n'
-            html += f'                    <div class="divi-name">{divi_name}</div>\n'
-            html += '                    <div class="divi-categories">\n'
-            html += '                        <span class="partner-badge">Partner Divi</span>\n'
-            html += '                    </div>\n'
-            html += '                </div>\n'
+    cards = ''.join(cards)
+    fragments.save(cards, ''.join(linked_cards), card_urls)
+    html += cards
 
     html += '''            </div>
             <div class="no-results" id="noResults" style="display: none;">
@@ -657,9 +1087,11 @@ def generate_html_catalog(scraped_divis, partner_divis, category_divis):
         </footer>
     </div>
 
-    <script>
+    <script id="catalogScript">
+        const catalogData = ''' + catalog_data + ''';
         const searchInput = document.getElementById('searchInput');
         const categorySelect = document.getElementById('categorySelect');
+        const sortSelect = document.getElementById('sortSelect');
         const categoryTags = document.querySelectorAll('.category-tag');
         const diviCards = document.querySelectorAll('.divi-card');
         const diviGrid = document.getElementById('diviGrid');
@@ -674,114 +1106,476 @@ def generate_html_catalog(scraped_divis, partner_divis, category_divis):
         totalCategoriesEl.textContent = categoryTags.length;
         visibleDivisEl.textContent = diviCards.length;
 
-        let activeCategory = '';
+        // Read every card once; filtering and counting work on this array, not the DOM
+        const cards = Array.from(diviCards, card => ({
+            el: card,
+            name: card.dataset.name,
+            categories: card.dataset.categories,
+            catIds: card.dataset.catIds ? card.dataset.catIds.split(' ').map(Number) : [],
+            related: card.dataset.related ? card.dataset.related.split(' ').map(Number) : [],
+            visible: true
+        }));
+        const cardByElement = new Map(cards.map(card => [card.el, card]));
+
+        const categoryIndex = new Map(catalogData.categories.map((cat, id) => [cat, id]));
+        const tagEls = [];
+        const countEls = [];
+        const optionEls = [];
+        categoryTags.forEach(tag => {
+            const id = categoryIndex.get(tag.dataset.category);
+            tagEls[id] = tag;
+            countEls[id] = tag.querySelector('.count');
+        });
+        Array.from(categorySelect.options).forEach(option => {
+            if (option.value) {
+                optionEls[categoryIndex.get(option.value)] = option;
+            }
+        });
+
+        // The active category, if any; tags and the dropdown select one at a time
+        const selectedIds = new Set();
+
+        // Typing waits this long for the next key before searching
+        const SEARCH_DELAY = 150;
+
+        // Search and facet counting, run in a Web Worker so typing never waits
+        // for it. The worker keeps which cards are shown and answers each query
+        // with only the cards to show and to hide. It must not use anything
+        // outside this function: its source is what the worker runs.
+        function searchWorker(self) {
+            // Query results kept, least recently used dropped first
+            const QUERY_CACHE_SIZE = 64;
+
+            let cards = [];
+            let cooccurrence = [];
+            let categoryMembers = [];
+            let shown = new Uint8Array(0);
+            const queryCache = new Map();
+
+            function matchesTerm(card, term) {
+                return card.name.includes(term) || card.categories.includes(term);
+            }
+
+            function scanPositions(term, selected) {
+                // Scan the smallest selected category instead of every card
+                let candidates = null;
+                selected.forEach(id => {
+                    if (!candidates || categoryMembers[id].length < candidates.length) {
+                        candidates = categoryMembers[id];
+                    }
+                });
+                const total = candidates ? candidates.length : cards.length;
+                const matches = [];
+                for (let i = 0; i < total; i++) {
+                    const position = candidates ? candidates[i] : i;
+                    const card = cards[position];
+                    if (matchesTerm(card, term) && selected.every(id => card.catIds.includes(id))) {
+                        matches.push(position);
+                    }
+                }
+                return matches;
+            }
+
+            function cachedResults(term, selected) {
+                const selection = selected.slice().sort((a, b) => a - b).join(' ') + '|';
+                let results = queryCache.get(selection + term);
+                if (results) {
+                    // Move it to the most recently used end
+                    queryCache.delete(selection + term);
+                    queryCache.set(selection + term, results);
+                    return results;
+                }
+
+                // A card containing the term contains every prefix of it, so
+                // typing on only narrows the longest cached prefix
+                let matches = null;
+                for (let length = term.length - 1; length >= 0 && !matches; length--) {
+                    const prefix = queryCache.get(selection + term.slice(0, length));
+                    if (prefix) {
+                        matches = prefix.matches.filter(position => matchesTerm(cards[position], term));
+                    }
+                }
+                if (!matches) {
+                    matches = scanPositions(term, selected);
+                }
+
+                results = {matches: matches, counts: facetCounts(matches, term, selected)};
+                queryCache.set(selection + term, results);
+                if (queryCache.size > QUERY_CACHE_SIZE) {
+                    queryCache.delete(queryCache.keys().next().value);
+                }
+                return results;
+            }
+
+            function facetCounts(matches, term, selected) {
+                // Without a search term the precomputed matrix has the answer
+                if (!term && selected.length === 0) {
+                    return cooccurrence.map((row, id) => row[id]);
+                }
+                if (!term && selected.length === 1) {
+                    return cooccurrence[selected[0]];
+                }
+                const counts = new Array(cooccurrence.length).fill(0);
+                matches.forEach(position => cards[position].catIds.forEach(id => counts[id]++));
+                return counts;
+            }
+
+            self.onmessage = event => {
+                const message = event.data;
+                if (message.type === 'init') {
+                    cards = message.cards;
+                    cooccurrence = message.cooccurrence;
+                    categoryMembers = cooccurrence.map(() => []);
+                    cards.forEach((card, position) => card.catIds.forEach(id => categoryMembers[id].push(position)));
+                    shown = Uint8Array.from(message.shown);
+                    queryCache.clear();
+                    return;
+                }
+
+                const results = cachedResults(message.term, message.selected);
+                const matches = results.matches;
+                const visible = new Uint8Array(cards.length);
+                matches.forEach(position => { visible[position] = 1; });
+                const show = [];
+                const hide = [];
+                for (let position = 0; position < cards.length; position++) {
+                    if (visible[position] !== shown[position]) {
+                        (visible[position] ? show : hide).push(position);
+                    }
+                }
+                shown = visible;
+                self.postMessage({
+                    id: message.id,
+                    term: message.term,
+                    count: matches.length,
+                    show: show,
+                    hide: hide,
+                    counts: results.counts
+                });
+            };
+        }
+
+        function searchInit() {
+            return {
+                type: 'init',
+                cooccurrence: catalogData.cooccurrence,
+                cards: cards.map(card => ({name: card.name, categories: card.categories, catIds: card.catIds})),
+                shown: cards.map(card => card.visible ? 1 : 0)
+            };
+        }
+
+        function localSearch() {
+            // The same code on this thread, answering synchronously
+            const scope = {postMessage: applyResults};
+            searchWorker(scope);
+            const local = {postMessage: message => scope.onmessage({data: message})};
+            local.postMessage(searchInit());
+            return local;
+        }
+
+        function startSearch() {
+            let worker;
+            try {
+                const source = new Blob(['(' + searchWorker + ')(self);'], {type: 'text/javascript'});
+                worker = new Worker(URL.createObjectURL(source));
+            } catch (error) {
+                // No workers here (old browser, strict file:// rules)
+                return localSearch();
+            }
+            worker.onmessage = event => applyResults(event.data);
+            worker.onerror = () => {
+                // A worker that fails hands over to the page, which asks again
+                worker.terminate();
+                search = localSearch();
+                filterDivis();
+            };
+            worker.postMessage(searchInit());
+            return worker;
+        }
+
+        let queryId = 0;
+        let searchTimer = null;
+        let cardToReveal = null;
 
         function filterDivis() {
-            const searchTerm = searchInput.value.toLowerCase();
-            const selectedCategory = categorySelect.value.toLowerCase();
+            clearTimeout(searchTimer);
+            queryId++;
+            search.postMessage({
+                type: 'query',
+                id: queryId,
+                term: searchInput.value.toLowerCase(),
+                selected: Array.from(selectedIds)
+            });
+            saveFilterState();
+        }
 
-            let visibleCount = 0;
+        function saveFilterState() {
+            // ?zoek=...&categorie=...&volgorde=... so a shared link opens filtered and sorted
+            const params = new URLSearchParams(location.search);
+            params.delete('zoek');
+            params.delete('categorie');
+            params.delete('volgorde');
+            if (searchInput.value) {
+                params.set('zoek', searchInput.value);
+            }
+            selectedIds.forEach(id => params.append('categorie', catalogData.categories[id]));
+            if (sortSelect && sortSelect.value !== 'naam') {
+                params.set('volgorde', sortSelect.value);
+            }
+            const query = params.toString();
+            try {
+                history.replaceState(history.state, '', (query ? '?' + query : location.pathname) + location.hash);
+            } catch (error) {
+                // Some browsers do not let file:// pages rewrite their URL
+            }
+        }
 
-            diviCards.forEach(card => {
-                const name = card.dataset.name;
-                const categories = card.dataset.categories;
+        function restoreFilterState() {
+            const params = new URLSearchParams(location.search);
+            const cat = params.getAll('categorie').find(cat => categoryIndex.has(cat));
+            if (cat) {
+                selectedIds.add(categoryIndex.get(cat));
+            }
+            searchInput.value = params.get('zoek') || '';
+            // The order first: filterDivis() writes the URL back from the controls
+            const order = params.get('volgorde');
+            if (sortSelect && order !== 'naam' && catalogData.orders.hasOwnProperty(order)) {
+                sortSelect.value = order;
+                applyOrder(order);
+            }
+            if (searchInput.value || selectedIds.size) {
+                syncSelection();
+                filterDivis();
+            }
+        }
 
-                const matchesSearch = name.includes(searchTerm) || categories.includes(searchTerm);
-                const matchesCategory = !selectedCategory || categories.includes(selectedCategory.toLowerCase());
+        function applyOrder(order) {
+            // Orders are card positions sorted at build time; appending moves the cards
+            const fragment = document.createDocumentFragment();
+            catalogData.orders[order].forEach(position => fragment.appendChild(cards[position].el));
+            diviGrid.appendChild(fragment);
+        }
 
-                if (matchesSearch && matchesCategory) {
-                    card.style.display = 'block';
-                    visibleCount++;
-                } else {
-                    card.style.display = 'none';
+        function updateFacets(counts) {
+            counts.forEach((count, id) => {
+                if (countEls[id]) {
+                    countEls[id].textContent = count;
+                    tagEls[id].classList.toggle('empty', count === 0 && !selectedIds.has(id));
+                }
+                if (optionEls[id]) {
+                    optionEls[id].textContent = `${catalogData.categories[id]} (${count})`;
                 }
             });
+        }
+
+        function applyResults(results) {
+            // Every reply is applied, in order: each one is a diff on the one before
+            results.show.forEach(position => {
+                cards[position].el.style.display = 'block';
+                cards[position].visible = true;
+            });
+            results.hide.forEach(position => {
+                cards[position].el.style.display = 'none';
+                cards[position].visible = false;
+            });
+            // The rest waits for the answer to the latest query
+            if (results.id !== queryId) {
+                return;
+            }
+
+            const visibleCount = results.count;
+            updateFacets(results.counts);
 
             visibleDivisEl.textContent = visibleCount;
             noResults.style.display = visibleCount === 0 ? 'block' : 'none';
             diviGrid.style.display = visibleCount === 0 ? 'none' : 'grid';
 
             // Update header
-            if (selectedCategory) {
+            if (selectedIds.size) {
                 resultsHeader.textContent = `${categorySelect.value} (${visibleCount} Divi's)`;
-            } else if (searchTerm) {
-                resultsHeader.textContent = `Zoekresultaten voor "${searchTerm}" (${visibleCount} Divi's)`;
+            } else if (results.term) {
+                resultsHeader.textContent = `Zoekresultaten voor "${results.term}" (${visibleCount} Divi's)`;
             } else {
                 resultsHeader.textContent = `Alle Divi's (${visibleCount})`;
             }
+
+            if (cardToReveal) {
+                const card = cardToReveal;
+                cardToReveal = null;
+                highlightCard(card);
+            }
         }
 
-        searchInput.addEventListener('input', filterDivis);
-        categorySelect.addEventListener('change', () => {
-            // Update active tag
-            categoryTags.forEach(tag => {
-                tag.classList.remove('active');
-                if (tag.dataset.category === categorySelect.value) {
-                    tag.classList.add('active');
-                }
+        let search = startSearch();
+
+        function syncSelection() {
+            tagEls.forEach((tag, id) => tag.classList.toggle('active', selectedIds.has(id)));
+            categorySelect.value = selectedIds.size === 1 ? catalogData.categories[[...selectedIds][0]] : '';
+        }
+
+        function highlightCard(card) {
+            card.el.scrollIntoView({behavior: 'smooth', block: 'center'});
+            card.el.classList.add('highlight');
+            setTimeout(() => card.el.classList.remove('highlight'), 1500);
+        }
+
+        function showCard(card) {
+            // Clear the filters if they hide the card; it is shown once they are applied
+            if (!card.visible) {
+                searchInput.value = '';
+                selectedIds.clear();
+                syncSelection();
+                cardToReveal = card;
+                filterDivis();
+                return;
+            }
+            highlightCard(card);
+        }
+
+        function toggleRelated(card) {
+            // The related list is built on first use; data-related holds card positions
+            const open = card.el.querySelector('.divi-related');
+            if (open) {
+                open.remove();
+                return;
+            }
+            const list = document.createElement('div');
+            list.className = 'divi-related';
+            const label = document.createElement('span');
+            label.className = 'related-label';
+            label.textContent = "Gerelateerde Divi's";
+            list.appendChild(label);
+            card.related.forEach(position => {
+                const related = cards[position];
+                const button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'related-divi';
+                button.textContent = related.el.querySelector('.divi-name').textContent;
+                button.addEventListener('click', event => {
+                    event.stopPropagation();
+                    showCard(related);
+                });
+                list.appendChild(button);
             });
+            card.el.appendChild(list);
+        }
+
+        diviGrid.addEventListener('click', event => {
+            // Links on the card keep opening the divi page
+            if (event.target.closest('a')) {
+                return;
+            }
+            const card = cardByElement.get(event.target.closest('.divi-card'));
+            if (card && card.related.length) {
+                toggleRelated(card);
+            }
+        });
+
+        searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(filterDivis, SEARCH_DELAY);
+        });
+        if (sortSelect) {
+            sortSelect.addEventListener('change', () => {
+                applyOrder(sortSelect.value);
+                saveFilterState();
+            });
+        }
+        categorySelect.addEventListener('change', () => {
+            selectedIds.clear();
+            if (categorySelect.value) {
+                selectedIds.add(categoryIndex.get(categorySelect.value));
+            }
+            syncSelection();
             filterDivis();
         });
 
         categoryTags.forEach(tag => {
             tag.addEventListener('click', () => {
-                const category = tag.dataset.category;
-
-                if (categorySelect.value === category) {
-                    // Deselect
-                    categorySelect.value = '';
-                    tag.classList.remove('active');
-                } else {
-                    categorySelect.value = category;
-                    categoryTags.forEach(t => t.classList.remove('active'));
-                    tag.classList.add('active');
+                // Clicking the active tag clears it, any other tag selects only that category
+                const id = categoryIndex.get(tag.dataset.category);
+                const wasActive = selectedIds.has(id);
+                selectedIds.clear();
+                if (!wasActive) {
+                    selectedIds.add(id);
                 }
+                syncSelection();
                 filterDivis();
             });
         });
+
+        restoreFilterState();
     </script>
 </body>
 </html>
 '''
 
-    with open('Divi_Catalogus_Interactief.html', 'w', encoding='utf-8') as f:
+    with atomic_open('Divi_Catalogus_Interactief.html', encoding='utf-8') as f:
         f.write(html)
 
-    print(f"Generated: Divi_Catalogus_Interactief.html")
-
-def main():
-    print("=" * 60)
-    print("Indiveo Divi Catalogus Generator")
-    print("=" * 60)
-    print()
+    if cache_dir:
+        print(f"Generated: Divi_Catalogus_Interactief.html ({fragments.hits} of {len(card_names)} cards unchanged)")
+    else:
+        print(f"Generated: Divi_Catalogus_Interactief.html")
 
-    # Extract data from scraped file
-    print("1. Extracting divis from scraped data...")
-    scraped_divis, divi_urls = extract_divis_from_scrape()
-    print(f"   Found {len(scraped_divis)} divis")
-    print(f"   Found {len(divi_urls)} URLs")
-
-    # Read incomplete overview for Partner Divi info
-    print("\n2. Reading incomplete overview for Partner Divi info...")
-    partner_divis, pdf_divis, existing_entries = read_incomplete_overview()
-    print(f"   Found {len(partner_divis)} Partner Divis")
-    print(f"   Found {len(pdf_divis)} PDF entries")
+def build_outputs(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries,
+                  sqlite=False, descriptions=None, profiler=None, scrape_path=SCRAPE_FILE, related=False,
+                  cache_dir=None):
+    """Write every output from the parsed inputs (steps 3-5 of the generator)."""
+    profiler = profiler or NullProfiler()
 
     # Generate completed overview
     print("\n3. Generating completed overview CSV...")
-    rows = generate_completed_overview(scraped_divis, partner_divis, pdf_divis, existing_entries)
+    with profiler.stage('overview'):
+        rows = generate_completed_overview(scraped_divis, partner_divis, pdf_divis, existing_entries)
 
     # Generate completed overview v2 with URLs
     print("\n3b. Generating completed overview CSV v2 (with URLs)...")
-    rows_v2 = generate_completed_overview_v2(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries)
+    with profiler.stage('overview_v2'):
+        rows_v2 = generate_completed_overview_v2(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries)
 
     # Generate creative catalog
     print("\n4. Generating creative catalog CSV...")
-    category_divis = generate_creative_catalog(scraped_divis, partner_divis)
+    with profiler.stage('creative'):
+        category_divis = generate_creative_catalog(scraped_divis, partner_divis)
+
+    # Find related divis
+    related_divis = None
+    if related:
+        print("\n4a. Finding related divis...")
+        with profiler.stage('related'):
+            if descriptions is None:
+                descriptions = extract_divi_descriptions(scrape_path)
+            related_divis = find_related_divis(scraped_divis, existing_entries, descriptions)
+        print(f"   Found neighbours for {sum(1 for names in related_divis.values() if names)} divis")
+
+    # Generate NDJSON export
+    print("\n4b. Generating NDJSON export...")
+    with profiler.stage('json_export'):
+        generate_json_export(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries, related_divis)
+
+    # Generate SQLite catalog
+    if sqlite:
+        print("\n4c. Writing SQLite catalog...")
+        with profiler.stage('sqlite'):
+            if descriptions is None:
+                descriptions = extract_divi_descriptions(scrape_path)
+            generate_sqlite_catalog(
+                catalog_records(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries, related_divis),
+                descriptions,
+            )
 
     # Generate HTML catalog
     print("\n5. Generating interactive HTML catalog...")
-    generate_html_catalog(scraped_divis, partner_divis, category_divis)
+    with profiler.stage('html'):
+        generate_html_catalog(scraped_divis, partner_divis, category_divis, related_divis, divi_urls, cache_dir)
+
+    profile_path = profiler.finish(
+        scrape_bytes=os.path.getsize(scrape_path),
+        divis=len(scraped_divis),
+        rows=len(rows_v2),
+        categories=len(category_divis),
+    )
 
     print("\n" + "=" * 60)
     print("COMPLETE! Generated files:")
@@ -789,8 +1583,59 @@ def main():
     print("  1b. Compleet_Overzicht_Divis_v2.csv - With URL column")
     print("  2. Catalogus_Per_Categorie.csv - Overview per category")
     print("  3. Catalogus_Detail.csv - Detailed divi list")
+    print(f"  3b. {JSON_EXPORT_FILE} - One JSON record per divi")
+    if sqlite:
+        print(f"  3c. {SQLITE_FILE} - SQLite catalog with full text search")
     print("  4. Divi_Catalogus_Interactief.html - Interactive HTML")
+    if profile_path:
+        print(f"  Profiles for build {profiler.build_id}: {profile_path}")
+    print("=" * 60)
+
+    return category_divis
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Indiveo Divi catalog outputs.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parse the scrape export in parallel with this many processes")
+    parser.add_argument('--sqlite', action='store_true',
+                        help=f"also write the catalog to {SQLITE_FILE} with a full text index")
+    parser.add_argument('--related', action='store_true',
+                        help="list related divis in the outputs (needs numpy and scipy)")
+    parser.add_argument('--profile', action='store_true',
+                        help="write cProfile stats and collapsed stacks for every stage")
+    parser.add_argument('--profile-dir', default=PROFILE_DIR,
+                        help="directory for per-build profile output (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"render every card instead of reusing unchanged ones from {CACHE_DIR}")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler = BuildProfiler(make_build_id([SCRAPE_FILE, default_overview_path()]), args.profile_dir)
+    else:
+        profiler = NullProfiler()
+
     print("=" * 60)
+    print("Indiveo Divi Catalogus Generator")
+    print("=" * 60)
+    print()
+
+    # Extract data from scraped file
+    print("1. Extracting divis from scraped data...")
+    with profiler.stage('extract'):
+        scraped_divis, divi_urls = extract_divis_from_scrape(workers=args.workers)
+    print(f"   Found {len(scraped_divis)} divis")
+    print(f"   Found {len(divi_urls)} URLs")
+
+    # Read incomplete overview for Partner Divi info
+    print("\n2. Reading incomplete overview for Partner Divi info...")
+    with profiler.stage('overview_input'):
+        partner_divis, pdf_divis, existing_entries = read_incomplete_overview()
+    print(f"   Found {len(partner_divis)} Partner Divis")
+    print(f"   Found {len(pdf_divis)} PDF entries")
+
+    build_outputs(scraped_divis, divi_urls, partner_divis, pdf_divis, existing_entries,
+                  sqlite=args.sqlite, profiler=profiler, related=args.related,
+                  cache_dir=None if args.no_cache else CACHE_DIR)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import sys
+
+from output_writer import atomic_open
+
+PUBLIC_DIR = 'public'
+ENTRY_PAGE = 'Divi_Catalogus_Indiveo_Style.html'
+PAGES = ['Divi_Catalogus_Indiveo_Style.html', 'Divi_Catalogus_Interactief.html']
+MANIFEST_FILE = 'asset-manifest.json'
+SERVICE_WORKER_FILE = 'sw.js'
+
+REGISTRATION_SNIPPET = """    <script id="swRegistration">
+        if ('serviceWorker' in navigator && location.protocol !== 'file:') {
+            window.addEventListener('load', () => navigator.serviceWorker.register('sw.js'));
+        }
+    </script>
+"""
+
+SERVICE_WORKER_JS = """// Generated by offline_bundle.py - do not edit
+const VERSION = '%(version)s';
+const PRECACHE = 'divi-catalog-' + VERSION;
+const FONT_CACHE = 'divi-fonts';
+const ASSETS = %(assets)s;
+const ASSET_URLS = new Set(ASSETS.map(asset => new URL(asset, self.location).href));
+const ENTRY_URL = new URL('%(entry)s', self.location).href;
+// Copies of the entry page, answered from its cache entry
+const ENTRY_ALIASES = new Set(['./', 'index.html'].map(path => new URL(path, self.location).href));
+
+// The cache key of a precached asset: no query string (the catalog keeps its
+// filters there), and ./ or index.html mean the entry page. Null for anything else.
+function assetKey(url) {
+    const key = new URL(url.pathname, url.origin).href;
+    if (ENTRY_ALIASES.has(key)) {
+        return ENTRY_URL;
+    }
+    return ASSET_URLS.has(key) ? key : null;
+}
+
+self.addEventListener('install', event => {
+    // Fetch past the HTTP cache so the new version really is new
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then(cache => cache.addAll(ASSETS.map(asset => new Request(asset, {cache: 'reload'}))))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('divi-catalog-') && key !== PRECACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+
+    const key = url.origin === self.location.origin ? assetKey(url) : null;
+
+    if (key) {
+        // Stale-while-revalidate: answer from cache, refresh it in the background
+        event.respondWith(caches.open(PRECACHE).then(cache =>
+            cache.match(key).then(cached => {
+                const network = fetch(request).then(response => {
+                    if (response.ok) {
+                        cache.put(key, response.clone());
+                    }
+                    return response;
+                });
+                if (cached) {
+                    event.waitUntil(network.catch(() => null));
+                    return cached;
+                }
+                return network;
+            })
+        ));
+    } else if (url.hostname === 'fonts.googleapis.com' || url.hostname === 'fonts.gstatic.com') {
+        // Font files are immutable; the stylesheet is refreshed in the background
+        event.respondWith(caches.open(FONT_CACHE).then(cache =>
+            cache.match(request).then(cached => {
+                const network = fetch(request).then(response => {
+                    cache.put(request, response.clone());
+                    return response;
+                });
+                if (cached) {
+                    if (url.hostname === 'fonts.googleapis.com') {
+                        event.waitUntil(network.catch(() => null));
+                    }
+                    return cached;
+                }
+                return network;
+            })
+        ));
+    }
+});
+"""
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def add_registration(html):
+    """Add the service worker registration before </body>, once."""
+    if 'id="swRegistration"' in html:
+        return html
+    return html.replace('</body>', REGISTRATION_SNIPPET + '</body>', 1)
+
+def _write_page(path, html):
+    with atomic_open(path, encoding='utf-8') as f:
+        f.write(html)
+
+def publish_pages(public_dir=PUBLIC_DIR, source_dir='.'):
+    """Copy the generated catalog pages into the public directory."""
+    os.makedirs(public_dir, exist_ok=True)
+    for page in PAGES:
+        source = os.path.join(source_dir, page)
+        target = os.path.join(public_dir, page)
+        if os.path.exists(source) and os.path.abspath(source) != os.path.abspath(target):
+            with open(source, 'r', encoding='utf-8') as f:
+                _write_page(target, f.read())
+
+def generate_offline_bundle(public_dir=PUBLIC_DIR):
+    """Make the public catalog work offline and load instantly on repeat visits.
+
+    - every page registers sw.js
+    - index.html is the catalog itself instead of a meta-refresh hop; it
+      is not precached, the service worker answers it with the entry page
+    - asset-manifest.json maps every asset to a content hash
+    - sw.js precaches those assets under a version derived from the
+      manifest, serves them stale-while-revalidate and drops old versions,
+      so a new deploy is picked up in the background; other same-origin
+      requests are left to the network, so the cache holds one entry per
+      asset whatever query string a page was opened with
+    """
+    for page in PAGES:
+        path = os.path.join(public_dir, page)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                _write_page(path, add_registration(f.read()))
+
+    entry_path = os.path.join(public_dir, ENTRY_PAGE)
+    with open(entry_path, 'r', encoding='utf-8') as f:
+        entry_html = f.read()
+    canonical = f'    <link rel="canonical" href="{ENTRY_PAGE}">\n'
+    if canonical not in entry_html:
+        entry_html = entry_html.replace('</head>', canonical + '</head>', 1)
+    _write_page(os.path.join(public_dir, 'index.html'), entry_html)
+
+    assets = {}
+    for name in sorted(os.listdir(public_dir)):
+        path = os.path.join(public_dir, name)
+        if name.startswith('.') or name in (MANIFEST_FILE, SERVICE_WORKER_FILE) or not os.path.isfile(path):
+            continue
+        assets[name] = _content_hash(path)
+
+    version = hashlib.sha256(json.dumps(assets, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    manifest = {"version": version, "assets": assets}
+    with atomic_open(os.path.join(public_dir, MANIFEST_FILE), encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+    # index.html is a copy of the entry page; sw.js answers ./ and index.html
+    # from the entry page's cache entry, so the page is downloaded once
+    precache = [name for name in assets if name != 'index.html'] + [MANIFEST_FILE]
+    with atomic_open(os.path.join(public_dir, SERVICE_WORKER_FILE), encoding='utf-8', newline='\n') as f:
+        f.write(SERVICE_WORKER_JS % {"version": version, "entry": ENTRY_PAGE,
+                                     "assets": json.dumps(precache, indent=4, ensure_ascii=False)})
+
+    print(f"Generated: {SERVICE_WORKER_FILE} and {MANIFEST_FILE} in {public_dir} (version {version}, {len(assets)} assets)")
+    return manifest
+
+def main():
+    public_dir = sys.argv[1] if len(sys.argv) > 1 else PUBLIC_DIR
+    generate_offline_bundle(public_dir)
+
+if __name__ == '__main__':
+    main()
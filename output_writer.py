@@ -0,0 +1,85 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def _same_content(tmp_path, path):
+    """True if ``path`` already holds exactly the bytes written to ``tmp_path``."""
+    try:
+        if os.path.getsize(tmp_path) != os.path.getsize(path):
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(tmp_path) == file_digest(path)
+
+def _fsync_directory(directory):
+    """Persist a rename by syncing its directory (not possible on Windows)."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temp path next to ``path``; move the file written there into place.
+
+    For writers that need a filename rather than a file object (sqlite3,
+    zip archives). The same fsync, rename and unchanged-content rules as
+    atomic_open() apply.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        if _same_content(tmp_path, path):
+            os.unlink(tmp_path)
+            return
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+@contextmanager
+def atomic_open(path, encoding='utf-8', newline=None, mode='w'):
+    """Write to a temp file next to ``path`` and rename it into place on success.
+
+    Readers (a browser refresh, a static file server) see either the old
+    file or the complete new one, never a half-written file. The temp file
+    is fsynced before the rename. If the new content hashes the same as the
+    existing file, the file is left untouched so its mtime (and any cache
+    keyed on it) stays valid.
+    """
+    with atomic_path(path) as tmp_path:
+        if 'b' in mode:
+            f = open(tmp_path, mode)
+        else:
+            f = open(tmp_path, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
@@ -0,0 +1,213 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+from html.parser import HTMLParser
+
+from output_writer import atomic_open
+from parse_cache import CACHE_DIR
+
+PUBLIC_DIR = 'public'
+# Kept in the cache directory, outside the deployed pages
+REPORT_FILE = 'page_report.json'
+
+# Limits per page; a budgets file can change them for all pages or per page
+DEFAULT_BUDGETS = {
+    "bytes": 512000,
+    "gzip_bytes": 64000,
+    "dom_nodes": 4000,
+    "inline_css": 24000,
+    "inline_js": 48000,
+    "blocking_requests": 1,
+}
+
+# A metric that grew this much over its baseline is flagged even within budget
+GROWTH_WARNING = 0.10
+
+METRIC_LABELS = {
+    "bytes": "bytes",
+    "gzip_bytes": "gzip",
+    "dom_nodes": "nodes",
+    "inline_css": "css",
+    "inline_js": "js",
+    "blocking_requests": "blocking",
+}
+
+class PageStats(HTMLParser):
+    """Count elements, inline CSS/JS and render-blocking requests of one page.
+
+    Render-blocking means a stylesheet link (for all media) or a classic
+    script with src and neither async nor defer, anywhere before <body>,
+    plus every @import in an inline style.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.dom_nodes = 0
+        self.inline_css = 0
+        self.inline_js = 0
+        self.blocking = []
+        self._in_body = False
+        self._inline = None
+
+    def handle_starttag(self, tag, attrs):
+        self.dom_nodes += 1
+        attrs = dict(attrs)
+        if tag == 'body':
+            self._in_body = True
+        elif tag == 'style':
+            self._inline = 'css'
+        elif tag == 'script':
+            if attrs.get('src'):
+                if (not self._in_body and 'async' not in attrs and 'defer' not in attrs
+                        and attrs.get('type') != 'module'):
+                    self.blocking.append(attrs['src'])
+            else:
+                self._inline = 'js'
+        elif tag == 'link' and not self._in_body:
+            rels = (attrs.get('rel') or '').lower().split()
+            if 'stylesheet' in rels and (attrs.get('media') or 'all') in ('all', 'screen'):
+                self.blocking.append(attrs.get('href'))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in ('style', 'script'):
+            self._inline = None
+
+    def handle_data(self, data):
+        if self._inline == 'css':
+            self.inline_css += len(data.encode('utf-8'))
+            self.blocking.extend('@import' for _ in range(data.count('@import')))
+        elif self._inline == 'js':
+            self.inline_js += len(data.encode('utf-8'))
+
+def page_metrics(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    stats = PageStats()
+    stats.feed(raw.decode('utf-8', errors='replace'))
+    stats.close()
+    return {
+        "bytes": len(raw),
+        "gzip_bytes": len(gzip.compress(raw, compresslevel=9, mtime=0)),
+        "dom_nodes": stats.dom_nodes,
+        "inline_css": stats.inline_css,
+        "inline_js": stats.inline_js,
+        "blocking_requests": len(stats.blocking),
+    }
+
+def html_pages(public_dir):
+    """Relative paths of every HTML page under public_dir, top-level pages first."""
+    pages = []
+    for root, dirs, files in os.walk(public_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.endswith('.html'):
+                pages.append(os.path.relpath(os.path.join(root, name), public_dir).replace(os.sep, '/'))
+    return sorted(pages, key=lambda page: (page.count('/'), page))
+
+def load_budgets(path=None):
+    """Budgets per page: DEFAULT_BUDGETS, then the file's top-level limits, then its "pages" entries.
+
+    A budgets file looks like {"gzip_bytes": 50000, "pages": {"index.html": {"dom_nodes": 2000}}}.
+    """
+    config = {}
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    unknown = (set(config) - {"pages"}) | {metric for limits in config.get("pages", {}).values() for metric in limits}
+    unknown -= set(DEFAULT_BUDGETS)
+    if unknown:
+        raise SystemExit(f"Unknown budget metrics in {path}: {', '.join(sorted(unknown))}")
+    defaults = dict(DEFAULT_BUDGETS)
+    defaults.update({metric: limit for metric, limit in config.items() if metric != "pages"})
+    return defaults, config.get("pages", {})
+
+def _load_reports(report_dir, public_dir):
+    """All saved reports, and the baseline of public_dir (empty without report_dir)."""
+    reports = {}
+    if report_dir and os.path.exists(os.path.join(report_dir, REPORT_FILE)):
+        with open(os.path.join(report_dir, REPORT_FILE), 'r', encoding='utf-8') as f:
+            reports = json.load(f)
+    return reports, reports.get(os.path.abspath(public_dir), {}).get("baseline", {})
+
+def check_budgets(public_dir=PUBLIC_DIR, budgets_path=None, warn_only=False, report_dir=CACHE_DIR,
+                  reset_baseline=False):
+    """Measure every page in public_dir and compare it with the budgets and its baseline.
+
+    Prints a table of the top-level pages and one line (largest values) per
+    subdirectory, then every page over budget or grown by more than
+    GROWTH_WARNING over its baseline. The baseline of a page is its first
+    measurement, kept until ``reset_baseline``, so growth adds up across
+    builds instead of resetting every run. Reports are saved per public
+    directory in ``<report_dir>/page_report.json``; with ``report_dir=None``
+    only the budgets are checked. Returns the number of pages over budget
+    (0 when ``warn_only``).
+    """
+    defaults, page_budgets = load_budgets(budgets_path)
+    reports, baseline = _load_reports(report_dir, public_dir)
+    if reset_baseline:
+        baseline = {}
+
+    report = {page: page_metrics(os.path.join(public_dir, page)) for page in html_pages(public_dir)}
+
+    rows = []
+    groups = {}
+    for page, metrics in report.items():
+        if '/' in page:
+            group = page.rsplit('/', 1)[0] + '/*.html'
+            groups.setdefault(group, []).append(metrics)
+        else:
+            rows.append((page, metrics))
+    for group, pages in groups.items():
+        rows.append((f"{group} ({len(pages)}, max)", {metric: max(m[metric] for m in pages) for metric in DEFAULT_BUDGETS}))
+
+    width = max([len(name) for name, _ in rows] + [4])
+    print(f"{'page':<{width}}" + ''.join(f" {METRIC_LABELS[metric]:>9}" for metric in DEFAULT_BUDGETS))
+    for name, metrics in rows:
+        print(f"{name:<{width}}" + ''.join(f" {metrics[metric]:>9}" for metric in DEFAULT_BUDGETS))
+
+    failures = []
+    warnings = []
+    for page, metrics in report.items():
+        limits = dict(defaults)
+        limits.update(page_budgets.get(page, {}))
+        for metric, value in metrics.items():
+            if value > limits[metric]:
+                failures.append(f"{page}: {METRIC_LABELS[metric]} {value} over budget {limits[metric]}")
+            old = baseline.get(page, {}).get(metric)
+            if old and value > old * (1 + GROWTH_WARNING):
+                warnings.append(f"{page}: {METRIC_LABELS[metric]} grew from {old} to {value} since the baseline")
+
+    for line in warnings:
+        print(f"   Warning: {line}")
+    for line in failures:
+        print(f"   {'Warning' if warn_only else 'Over budget'}: {line}")
+
+    if report_dir:
+        # New pages get their first measurement as baseline; removed pages drop out
+        baseline = {page: baseline.get(page, metrics) for page, metrics in report.items()}
+        reports[os.path.abspath(public_dir)] = {"baseline": baseline, "latest": report}
+        os.makedirs(report_dir, exist_ok=True)
+        with atomic_open(os.path.join(report_dir, REPORT_FILE), encoding='utf-8', newline='\n') as f:
+            json.dump(reports, f, indent=1, sort_keys=True)
+            f.write('\n')
+
+    print(f"Checked {len(report)} pages in {public_dir}: {len(failures)} over budget, {len(warnings)} grown")
+    return 0 if warn_only else len({line.split(':', 1)[0] for line in failures})
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the pages in public/ against performance budgets.")
+    parser.add_argument('public_dir', nargs='?', default=PUBLIC_DIR)
+    parser.add_argument('--budgets', help="JSON file with budget overrides")
+    parser.add_argument('--warn-only', action='store_true', help="report pages over budget without failing")
+    parser.add_argument('--reset-baseline', action='store_true', help="take the current sizes as the new baseline")
+    args = parser.parse_args()
+    return 1 if check_budgets(args.public_dir, args.budgets, args.warn_only,
+                              reset_baseline=args.reset_baseline) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import pickle
+
+from output_writer import atomic_open
+
+CACHE_DIR = '.divi_cache'
+
+# Bump when a parser's output changes so old snapshots are ignored
+CACHE_VERSION = 4
+
+def input_hash(path):
+    """SHA-256 of an input file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cached_parse(kind, path, parse, cache_dir=CACHE_DIR):
+    """Return ``parse(path)``, reusing a snapshot stored for identical input.
+
+    Snapshots are pickles named ``<kind>-v<version>-<input hash>.pickle``,
+    so any tool using the same cache directory shares them, and an edited
+    input simply gets a new snapshot. Pass ``cache_dir=None`` to bypass.
+    """
+    if not cache_dir:
+        return parse(path)
+
+    snapshot = os.path.join(cache_dir, f"{kind}-v{CACHE_VERSION}-{input_hash(path)}.pickle")
+    try:
+        with open(snapshot, 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    result = parse(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    with atomic_open(snapshot, mode='wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return result
+
+def load_scrape(path=None, workers=None, cache_dir=CACHE_DIR):
+    """(scraped_divis, divi_urls) for a scrape export, from cache when possible."""
+    import generate_outputs as gen
+    return cached_parse('scrape', path or gen.SCRAPE_FILE,
+                        lambda p: gen.extract_divis_from_scrape(p, workers=workers), cache_dir)
+
+def load_descriptions(path=None, cache_dir=CACHE_DIR):
+    """Divi descriptions for a scrape export, from cache when possible."""
+    import generate_outputs as gen
+    return cached_parse('descriptions', path or gen.SCRAPE_FILE, gen.extract_divi_descriptions, cache_dir)
+
+def load_overview(path=None, cache_dir=CACHE_DIR):
+    """(partner_divis, pdf_divis, existing_entries) from the Divitheek overview."""
+    import generate_outputs as gen
+    return cached_parse('overview', path or gen.default_overview_path(), gen.read_incomplete_overview, cache_dir)
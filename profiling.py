@@ -0,0 +1,125 @@
+import cProfile
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from output_writer import atomic_open, atomic_path
+
+PROFILE_DIR = 'profiles'
+
+def make_build_id(input_paths):
+    """Timestamp plus a short hash of the inputs, e.g. 20251210-143000-3fa2c1d9."""
+    digest = hashlib.sha256()
+    for path in input_paths:
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        except FileNotFoundError:
+            digest.update(b'missing:' + path.encode('utf-8'))
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + digest.hexdigest()[:8]
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _StackSampler:
+    """Samples one thread's Python stack from a background thread.
+
+    The samples are kept as collapsed stacks ("outer;inner;leaf" -> count),
+    the input format of flamegraph.pl, inferno and speedscope.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+class BuildProfiler:
+    """Writes cProfile stats and collapsed stacks per stage of one build.
+
+    Files land in ``<out_dir>/<build_id>/``: ``<stage>.prof`` (load with
+    pstats or snakeviz), ``<stage>.collapsed`` (feed to a flamegraph tool)
+    and ``build.json`` with stage timings and dataset sizes, so builds of
+    different inputs can be compared side by side. Work done in worker
+    processes (``--workers``) is not captured.
+    """
+
+    def __init__(self, build_id, out_dir=PROFILE_DIR, interval=0.001):
+        self.build_id = build_id
+        self.directory = os.path.join(out_dir, build_id)
+        self.interval = interval
+        self.timings = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        profile = cProfile.Profile()
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+
+        # A short switch interval lets the sampler thread get the GIL often
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, self.interval))
+        sampler.start()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.timings[name] = time.perf_counter() - start
+            sampler.stop()
+            sys.setswitchinterval(switch_interval)
+
+            with atomic_path(os.path.join(self.directory, f"{name}.prof")) as tmp_path:
+                profile.dump_stats(tmp_path)
+            with atomic_open(os.path.join(self.directory, f"{name}.collapsed"), encoding='utf-8') as f:
+                for stack, count in sorted(sampler.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+
+    def finish(self, **dataset):
+        """Write build.json with the stage timings and the given dataset sizes."""
+        summary = {
+            'build_id': self.build_id,
+            'python': sys.version.split()[0],
+            'stages': {name: round(seconds, 6) for name, seconds in self.timings.items()},
+            'dataset': dataset,
+        }
+        with atomic_open(os.path.join(self.directory, 'build.json'), encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return self.directory
+
+class NullProfiler:
+    """Stand-in used when profiling is off."""
+
+    build_id = None
+
+    def stage(self, name):
+        return nullcontext()
+
+    def finish(self, **dataset):
+        return None
@@ -0,0 +1,88 @@
+// Generated by offline_bundle.py - do not edit
+const VERSION = 'd8627c23f508';
+const PRECACHE = 'divi-catalog-' + VERSION;
+const FONT_CACHE = 'divi-fonts';
+const ASSETS = [
+    "Divi_Catalogus_Indiveo_Style.html",
+    "Divi_Catalogus_Interactief.html",
+    "asset-manifest.json"
+];
+const ASSET_URLS = new Set(ASSETS.map(asset => new URL(asset, self.location).href));
+const ENTRY_URL = new URL('Divi_Catalogus_Indiveo_Style.html', self.location).href;
+// Copies of the entry page, answered from its cache entry
+const ENTRY_ALIASES = new Set(['./', 'index.html'].map(path => new URL(path, self.location).href));
+
+// The cache key of a precached asset: no query string (the catalog keeps its
+// filters there), and ./ or index.html mean the entry page. Null for anything else.
+function assetKey(url) {
+    const key = new URL(url.pathname, url.origin).href;
+    if (ENTRY_ALIASES.has(key)) {
+        return ENTRY_URL;
+    }
+    return ASSET_URLS.has(key) ? key : null;
+}
+
+self.addEventListener('install', event => {
+    // Fetch past the HTTP cache so the new version really is new
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then(cache => cache.addAll(ASSETS.map(asset => new Request(asset, {cache: 'reload'}))))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('divi-catalog-') && key !== PRECACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+
+    const key = url.origin === self.location.origin ? assetKey(url) : null;
+
+    if (key) {
+        // Stale-while-revalidate: answer from cache, refresh it in the background
+        event.respondWith(caches.open(PRECACHE).then(cache =>
+            cache.match(key).then(cached => {
+                const network = fetch(request).then(response => {
+                    if (response.ok) {
+                        cache.put(key, response.clone());
+                    }
+                    return response;
+                });
+                if (cached) {
+                    event.waitUntil(network.catch(() => null));
+                    return cached;
+                }
+                return network;
+            })
+        ));
+    } else if (url.hostname === 'fonts.googleapis.com' || url.hostname === 'fonts.gstatic.com') {
+        // Font files are immutable; the stylesheet is refreshed in the background
+        event.respondWith(caches.open(FONT_CACHE).then(cache =>
+            cache.match(request).then(cached => {
+                const network = fetch(request).then(response => {
+                    cache.put(request, response.clone());
+                    return response;
+                });
+                if (cached) {
+                    if (url.hostname === 'fonts.googleapis.com') {
+                        event.waitUntil(network.catch(() => null));
+                    }
+                    return cached;
+                }
+                return network;
+            })
+        ));
+    }
+});
@@ -0,0 +1,167 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+import scipy.sparse as sp
+
+# Share of the similarity score that comes from shared categories; the rest
+# comes from description terms
+CATEGORY_WEIGHT = 0.5
+
+# Terms in more divis than this ("patiënt", "uitleg", ...) say little about
+# which divis belong together. The cap also bounds the number of candidate
+# pairs per divi, so the work grows linearly with the catalog.
+MAX_TERM_DIVIS = 200
+
+# Rows of the similarity matrix computed at a time
+BATCH_ROWS = 4096
+
+TERM = re.compile(r'[^\W\d_]{3,}')
+
+STOP_WORDS = {
+    'aan', 'als', 'bij', 'dan', 'dat', 'deze', 'die', 'dit', 'door', 'een', 'eens', 'geen',
+    'had', 'heb', 'hebben', 'heeft', 'het', 'hier', 'hij', 'hoe', 'hun', 'ook', 'kan', 'kunnen',
+    'maar', 'meer', 'met', 'naar', 'niet', 'nog', 'omdat', 'ons', 'onze', 'over', 'tot', 'uit',
+    'van', 'veel', 'voor', 'waar', 'wat', 'wel', 'wie', 'wij', 'wordt', 'worden', 'zal', 'zich',
+    'zijn', 'zij', 'zoals', 'zodat', 'zonder', 'divi', 'divis',
+}
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms) @ matrix
+
+def term_matrix(descriptions):
+    """L2-normalized TF-IDF rows (sublinear tf) over the informative description terms."""
+    # A new term gets the next id; the lookups run in C via map()
+    vocabulary = defaultdict()
+    vocabulary.default_factory = vocabulary.__len__
+    lengths = []
+    cols = []
+    for text in descriptions:
+        before = len(cols)
+        cols.extend(map(vocabulary.__getitem__, TERM.findall(text.lower())))
+        lengths.append(len(cols) - before)
+    rows = np.repeat(np.arange(len(descriptions)), lengths)
+
+    # Repeated (divi, term) entries are summed into term counts
+    n = len(descriptions)
+    matrix = sp.csr_matrix((np.ones(len(cols), dtype=np.float32), (rows, cols)),
+                           shape=(n, len(vocabulary)))
+    matrix.sum_duplicates()
+    df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    # A term in a single divi links it to nothing
+    keep = (df >= 2) & (df <= MAX_TERM_DIVIS)
+    for term in STOP_WORDS & vocabulary.keys():
+        keep[vocabulary[term]] = False
+    matrix = matrix[:, np.flatnonzero(keep)]
+    idf = np.log((1 + n) / (1 + df[keep])).astype(np.float32) + 1
+
+    matrix.data = 1 + np.log(matrix.data)
+    return _normalize_rows(matrix @ sp.diags(idf)).tocsr().astype(np.float32)
+
+def category_signatures(category_lists):
+    """(signature id per divi, signature-by-signature cosine similarity).
+
+    Divis with the same set of categories share a signature, and a catalog
+    has far fewer signatures than divis, so the category part of every pair
+    score is a lookup in a small dense matrix.
+    """
+    signature_ids = {}
+    divi_signatures = np.array([signature_ids.setdefault(tuple(sorted(cats)), len(signature_ids))
+                                for cats in category_lists], dtype=np.int32)
+    category_ids = {}
+    rows = []
+    cols = []
+    for signature, sig_id in signature_ids.items():
+        for cat in signature:
+            rows.append(sig_id)
+            cols.append(category_ids.setdefault(cat, len(category_ids)))
+    onehot = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                           shape=(len(signature_ids), len(category_ids)))
+    onehot = _normalize_rows(onehot)
+    return divi_signatures, (onehot @ onehot.T).toarray().astype(np.float32)
+
+def _signature_pools(divi_signatures, similarity, size):
+    """For each signature, the ``size`` divis with the most similar categories.
+
+    These are the best neighbours for a divi whose description shares no
+    term with anything; divis that do share terms are scored separately.
+    """
+    order = np.argsort(divi_signatures, kind='stable')
+    bounds = np.searchsorted(divi_signatures[order], np.arange(len(similarity) + 1))
+    pools = np.full((len(similarity), size), -1, dtype=np.int64)
+    for sig_id in range(len(similarity)):
+        pool = []
+        for other in np.argsort(-similarity[sig_id], kind='stable'):
+            if similarity[sig_id, other] <= 0:
+                break
+            pool.extend(order[bounds[other]:bounds[other + 1]][:size - len(pool)])
+            if len(pool) >= size:
+                break
+        pools[sig_id, :len(pool)] = pool
+    return pools
+
+def related_divis(names, category_lists, descriptions, k=5):
+    """Top-``k`` most similar divis for every divi, as {name: [names]}.
+
+    A divi is a sparse vector of its categories plus its description terms;
+    the score of a pair is CATEGORY_WEIGHT times the cosine of the category
+    part plus the rest times the cosine of the TF-IDF term part. Rows of the
+    term similarity matrix are computed a batch at a time with sparse
+    matrix products. The best ``k`` divis by categories alone (the pool of
+    the divi's category set) bound the ``k``-th best score from below, so
+    only the pairs sharing terms that reach that bound are sorted. There
+    are no pairwise Python loops.
+    """
+    n = len(names)
+    if n < 2 or k <= 0:
+        return {name: [] for name in names}
+
+    terms = term_matrix(descriptions)
+    terms_t = terms.T.tocsr()
+    divi_signatures, sig_similarity = category_signatures(category_lists)
+    # One extra because a divi is in its own pool
+    pools = _signature_pools(divi_signatures, sig_similarity, k + 1)
+
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    for start in range(0, n, BATCH_ROWS):
+        stop = min(start + BATCH_ROWS, n)
+        batch = np.arange(start, stop)
+        text = (terms[start:stop] @ terms_t).tocsr()
+
+        # Score the category pool first; its k-th best score is a floor that
+        # every pair in the row's top k must reach
+        pool_rows = np.repeat(batch, k + 1)
+        pool = pools[divi_signatures[start:stop]].ravel()
+        valid = (pool >= 0) & (pool != pool_rows)
+        pool_scores = np.full(len(pool), -1.0)
+        pool_scores[valid] = (
+            CATEGORY_WEIGHT * sig_similarity[divi_signatures[pool_rows[valid]], divi_signatures[pool[valid]]]
+            + (1 - CATEGORY_WEIGHT) * np.asarray(text[pool_rows[valid] - start, pool[valid]]).ravel())
+        floor = np.sort(pool_scores.reshape(-1, k + 1), axis=1)[:, 1]
+
+        # Only pairs sharing terms that reach the floor can change the top k
+        row_offsets = np.repeat(np.arange(stop - start, dtype=np.int32), np.diff(text.indptr))
+        row_similarity = sig_similarity[divi_signatures[start:stop]]
+        scores = row_similarity[row_offsets, divi_signatures[text.indices]]
+        scores *= CATEGORY_WEIGHT
+        scores += (1 - CATEGORY_WEIGHT) * text.data
+        keep = np.flatnonzero(scores >= floor[row_offsets])
+        rows = np.concatenate([row_offsets[keep] + start, pool_rows[valid]])
+        cols = np.concatenate([text.indices[keep], pool[valid]])
+        scores = np.concatenate([scores[keep], pool_scores[valid]])
+
+        _, first = np.unique(rows * n + cols, return_index=True)
+        rows, cols, scores = rows[first], cols[first], scores[first]
+        keep = (scores > 0) & (rows != cols)
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        # Highest score first within each row, then by divi order for ties
+        order = np.lexsort((cols, -scores, rows))
+        rows, cols = rows[order], cols[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, batch)[rows - start]
+        top = rank < k
+        neighbours[rows[top], rank[top]] = cols[top]
+
+    return {name: [names[j] for j in neighbours[i] if j >= 0] for i, name in enumerate(names)}
@@ -0,0 +1,248 @@
+import datetime
+import hashlib
+import html
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from collation import dutch_sorted
+from output_writer import atomic_open
+from parse_cache import CACHE_DIR
+
+SITE_DIR = 'public'
+DIVI_DIR = 'divis'
+CATEGORY_DIR = 'categorieen'
+SITEMAP_FILE = 'sitemap.xml'
+# Build state, kept in the cache directory so it is never deployed
+STATE_FILE = 'static_site.json'
+CATALOG_PAGE = 'Divi_Catalogus_Indiveo_Style.html'
+
+# Bump when the templates change, so every page is rendered again
+TEMPLATE_VERSION = 1
+
+# Below this many pages a process pool costs more than it saves
+MIN_PARALLEL_PAGES = 200
+
+PAGE_CSS = """
+        body { font-family: 'IBM Plex Sans', -apple-system, BlinkMacSystemFont, sans-serif; color: #333;
+               max-width: 760px; margin: 0 auto; padding: 32px 20px; line-height: 1.6; }
+        h1 { font-family: 'Poppins', sans-serif; color: #1a1a2e; }
+        a { color: #1474ff; }
+        .tags a { display: inline-block; background: #f5f5f5; border-radius: 15px; padding: 4px 12px;
+                  margin: 0 6px 6px 0; text-decoration: none; }
+        .partner { color: #f5576c; font-weight: 600; }
+        nav { margin-bottom: 24px; font-size: 0.9em; }
+"""
+
+def slugify(name):
+    """ASCII, lowercase, dash-separated form of a name for use in a file name."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-') or 'pagina'
+
+def _unique_slugs(names, preferred):
+    """One slug per name, preferring ``preferred[name]``; clashes get a number."""
+    slugs = {}
+    taken = set()
+    for name in names:
+        base = preferred.get(name) or slugify(name)
+        slug = base
+        n = 2
+        while slug in taken:
+            slug = f"{base}-{n}"
+            n += 1
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+def _url_slug(url):
+    """The last path segment of an indiveo.nl divi URL."""
+    return urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1] if url else None
+
+def site_pages(scraped_divis, divi_urls, category_divis):
+    """Describe every page as a plain dict holding everything it renders.
+
+    The dicts are what the change detection hashes, so a page is rendered
+    again exactly when something shown on it changed.
+    """
+    divi_names = dutch_sorted(set(scraped_divis) | {info["name"] for infos in category_divis.values() for info in infos})
+    categories = dutch_sorted(category_divis)
+    divi_slugs = _unique_slugs(divi_names, {name: _url_slug(divi_urls.get(name)) for name in divi_names})
+    category_slugs = _unique_slugs(categories, {})
+
+    divi_paths = {name: f"{DIVI_DIR}/{divi_slugs[name]}.html" for name in divi_names}
+    category_paths = {cat: f"{CATEGORY_DIR}/{category_slugs[cat]}.html" for cat in categories}
+
+    divi_categories = {name: [] for name in divi_names}
+    partner_names = set()
+    for cat in categories:
+        for info in category_divis[cat]:
+            divi_categories[info["name"]].append(cat)
+            if info["is_partner"]:
+                partner_names.add(info["name"])
+
+    pages = []
+    for name in divi_names:
+        pages.append({
+            "kind": "divi",
+            "path": divi_paths[name],
+            "name": name,
+            "url": divi_urls.get(name) or None,
+            "is_partner": name in partner_names,
+            "categories": [[cat, category_paths[cat]] for cat in dutch_sorted(divi_categories[name])],
+        })
+    for cat in categories:
+        pages.append({
+            "kind": "category",
+            "path": category_paths[cat],
+            "name": cat,
+            "divis": [[info["name"], divi_paths[info["name"]], info["is_partner"]]
+                      for info in dutch_sorted(category_divis[cat], key=lambda info: info["name"])],
+        })
+    return pages
+
+def page_hash(page):
+    return hashlib.sha256(json.dumps([TEMPLATE_VERSION, page], sort_keys=True).encode('utf-8')).hexdigest()
+
+def render_page(page):
+    """HTML for one divi or category page. Links are relative to the site root."""
+    name = html.escape(page["name"])
+    if page["kind"] == "divi":
+        title = f"{name} - Indiveo Divi"
+        description = f"Divi over {name}" + (f" ({html.escape(', '.join(cat for cat, _ in page['categories']))})"
+                                             if page["categories"] else "")
+        body = [f'<h1>{name}</h1>']
+        if page["is_partner"]:
+            body.append('<p class="partner">Partner Divi</p>')
+        if page["categories"]:
+            body.append('<p class="tags">' + ''.join(
+                f'<a href="../{quote(path)}">{html.escape(cat)}</a>' for cat, path in page["categories"]) + '</p>')
+        if page["url"]:
+            body.append(f'<p><a href="{html.escape(page["url"])}">Bekijk deze Divi op indiveo.nl</a></p>')
+    else:
+        title = f"{name} - Indiveo Divi's"
+        description = f"{len(page['divis'])} Divi's in de categorie {name}"
+        items = ''.join(
+            f'<li><a href="../{quote(path)}">{html.escape(divi)}</a>'
+            + (' <span class="partner">Partner</span>' if is_partner else '') + '</li>'
+            for divi, path, is_partner in page["divis"])
+        body = [f'<h1>{name}</h1>', f'<p>{description}</p>', f'<ul>{items}</ul>']
+
+    return f"""<!DOCTYPE html>
+<html lang="nl">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <meta name="description" content="{description}">
+    <style>{PAGE_CSS}    </style>
+</head>
+<body>
+    <nav><a href="../{CATALOG_PAGE}">Alle Divi's</a></nav>
+    {chr(10).join('    ' + line for line in body).lstrip()}
+</body>
+</html>
+"""
+
+def _render_pages(site_dir, pages):
+    """Render and write a batch of pages (runs in a worker process)."""
+    for page in pages:
+        with atomic_open(os.path.join(site_dir, page["path"]), encoding='utf-8') as f:
+            f.write(render_page(page))
+    return len(pages)
+
+def _load_state(state_dir, site_dir):
+    """Page hashes of the last build into site_dir, or {} for another directory."""
+    if not state_dir:
+        return {}
+    try:
+        with open(os.path.join(state_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return state.get("pages", {}) if state.get("site_dir") == os.path.abspath(site_dir) else {}
+
+def _save_state(state_dir, site_dir, pages):
+    if not state_dir:
+        return
+    os.makedirs(state_dir, exist_ok=True)
+    with atomic_open(os.path.join(state_dir, STATE_FILE), encoding='utf-8', newline='\n') as f:
+        json.dump({"site_dir": os.path.abspath(site_dir), "pages": pages}, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+def _write_sitemap(site_dir, state, site_url):
+    base = site_url.rstrip('/') + '/'
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+             f"  <url><loc>{html.escape(base)}</loc></url>"]
+    for path in sorted(state):
+        lines.append(f"  <url><loc>{html.escape(base + quote(path))}</loc>"
+                     f"<lastmod>{state[path]['lastmod']}</lastmod></url>")
+    lines.append('</urlset>')
+    with atomic_open(os.path.join(site_dir, SITEMAP_FILE), encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def generate_static_site(scraped_divis, divi_urls, category_divis, site_dir=SITE_DIR, site_url=None, workers=None,
+                         state_dir=CACHE_DIR):
+    """Write a static page per divi and per category, plus a sitemap.
+
+    Pages go to ``<site_dir>/divis/`` and ``<site_dir>/categorieen/``. The
+    hash of every page's source data is kept in ``<state_dir>/static_site.json``,
+    so only new or changed pages are rendered; pages whose divi or category
+    disappeared are removed. With ``state_dir=None`` every page is rendered.
+    With ``workers`` > 1 large batches are rendered in a process pool.
+
+    Sitemap locations must be absolute, so the sitemap is only written when
+    ``site_url`` is given; it lists each page's last change as lastmod.
+    """
+    if site_url and not (urlsplit(site_url).scheme in ('http', 'https') and urlsplit(site_url).netloc):
+        raise SystemExit(f"The site URL must be absolute, like https://example.nl/catalogus/ (got {site_url})")
+
+    pages = site_pages(scraped_divis, divi_urls, category_divis)
+    old_state = _load_state(state_dir, site_dir)
+    today = datetime.date.today().isoformat()
+
+    state = {}
+    stale = []
+    for page in pages:
+        digest = page_hash(page)
+        previous = old_state.get(page["path"])
+        if previous and previous["hash"] == digest and os.path.exists(os.path.join(site_dir, page["path"])):
+            state[page["path"]] = previous
+        else:
+            state[page["path"]] = {"hash": digest, "lastmod": today}
+            stale.append(page)
+
+    removed = [path for path in old_state if path not in state]
+    for path in removed:
+        try:
+            os.remove(os.path.join(site_dir, path))
+        except FileNotFoundError:
+            pass
+
+    for subdir in (DIVI_DIR, CATEGORY_DIR):
+        os.makedirs(os.path.join(site_dir, subdir), exist_ok=True)
+
+    if workers and workers > 1 and len(stale) >= MIN_PARALLEL_PAGES:
+        # A few batches per worker keeps the pool busy when pages vary in size
+        size = -(-len(stale) // (workers * 4))
+        batches = [stale[i:i + size] for i in range(0, len(stale), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_pages, [site_dir] * len(batches), batches))
+    else:
+        _render_pages(site_dir, stale)
+
+    _save_state(state_dir, site_dir, state)
+
+    print(f"Generated: {len(pages)} static pages in {site_dir} ({len(stale)} rendered, {len(removed)} removed)")
+    if site_url:
+        _write_sitemap(site_dir, state, site_url)
+        print(f"Generated: {os.path.join(site_dir, SITEMAP_FILE)} ({len(state) + 1} URLs)")
+    else:
+        # An old sitemap would list pages that may be gone
+        if os.path.exists(os.path.join(site_dir, SITEMAP_FILE)):
+            os.remove(os.path.join(site_dir, SITEMAP_FILE))
+        print(f"   Warning: no site URL given, so no {SITEMAP_FILE} (sitemap locations must be absolute)")
+    return state
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import crawl_records, write_scrape_export
+from generate_outputs import extract_divis_from_scrape
+
+# A small copy of the site: two themes that share a divi, one divi page that
+# errors and one whose connection drops
+FIXTURE_PAGES = {
+    '/specialismen-zorg': """<html><body><nav><a href="/themas/nav-only">Menu</a></nav>
+        <a href="/themas/kno">KNO</a> <a href="/themas/urologie">Urologie</a></body></html>""",
+    '/themas/kno': """<html><body><h1>KNO</h1>
+        <a href="/divis/amandelen">Amandelen knippen</a>
+        <a href="/divis/gehoor">Gehoortest</a>
+        <a href="/divis/kapot">Kapotte divi</a>
+        <a href="/divis/weg">Verdwenen divi</a></body></html>""",
+    '/themas/urologie': """<html><body><h1>Urologie</h1>
+        <a href="/divis/amandelen">Amandelen knippen</a></body></html>""",
+    '/divis/amandelen': """<html><body><h1>Amandelen knippen</h1>
+        <p>Uitleg over de ingreep.</p>
+        <div>Deze Divi bevat:<br>Animatie<br>Tekst</div>
+        <div class="divi-categories"><a>KNO</a>, <a>Kindergeneeskunde</a>, <a>Onbekend vak</a></div>
+        </body></html>""",
+    '/divis/gehoor': """<html><body><h1>Gehoortest</h1>
+        <p>Zo werkt een gehoortest.</p>
+        <div class="categories"><a>KNO</a></div></body></html>""",
+}
+ETAG = '"v1"'
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requests = []
+    not_modified = 0
+
+    def do_GET(self):
+        FixtureHandler.requests.append(self.path)
+        page = FIXTURE_PAGES.get(self.path)
+        if self.path == '/divis/weg':
+            self.close_connection = True
+            return
+        if page is None:
+            self.send_error(404 if self.path != '/divis/kapot' else 500)
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            FixtureHandler.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = page.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class CrawlerRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'http')
+        FixtureHandler.requests = []
+        FixtureHandler.not_modified = 0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def crawl(self, base_url=None):
+        return asyncio.run(crawl_records(base_url or self.base_url, concurrency=4, rate=0, cache_dir=self.cache_dir))
+
+    def test_export_parses_back(self):
+        rows = self.crawl()
+        path = os.path.join(self.tmp.name, 'export.csv')
+        write_scrape_export(rows, path)
+
+        divis, urls = extract_divis_from_scrape(path)
+        self.assertEqual(divis, {
+            'Amandelen knippen': {'KNO', 'Kindergeneeskunde'},
+            'Gehoortest': {'KNO'},
+        })
+        self.assertEqual(urls['Gehoortest'], self.base_url + '/divis/gehoor')
+        # Listed under both themes, fetched once
+        self.assertEqual(FixtureHandler.requests.count('/divis/amandelen'), 1)
+        self.assertEqual(len(rows), 3)
+
+    def test_second_crawl_revalidates(self):
+        first = self.crawl()
+        second = self.crawl()
+        self.assertEqual([row[1:] for row in first], [row[1:] for row in second])
+        # The index, both themes and both divis come back 304 from their ETag
+        self.assertEqual(FixtureHandler.not_modified, 5)
+
+    def test_unreachable_site(self):
+        # A port nothing listens on refuses the connection
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        self.assertEqual(self.crawl(f"http://127.0.0.1:{port}"), [])
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, 'index.json')))
+
+if __name__ == '__main__':
+    unittest.main()
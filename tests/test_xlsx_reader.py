@@ -0,0 +1,94 @@
+import csv
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_outputs import read_incomplete_overview
+from xlsx_reader import iter_xlsx_rows
+
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# The worksheet as its CSV export shows it
+SHEET_ROWS = [
+    ['Divi', 'Type', 'Type', 'Type'],
+    ['Amandelen knippen', 'KNO', 'Kindergeneeskunde', ''],
+    ['Astma Actieplan', 'Partner Divi', '', 'Longziekten'],
+    ['Bijsluiter', 'PDF', '-', ''],
+    ['Samen beslissen', 'PDF, Partner Divi', '12', '2.5'],
+    ['24-uurs urine', '', '', 'Urologie'],
+]
+
+SHARED_STRINGS = ['Divi', 'Type', 'Amandelen knippen', 'KNO', 'Kindergeneeskunde', 'Partner Divi',
+                  'Longziekten', 'Bijsluiter', 'PDF', '-', 'Samen beslissen', 'Urologie']
+
+# The same sheet as a spreadsheet program writes it: shared strings (one in
+# rich-text runs), inline strings, numbers as floats, cells left out where
+# they are empty and a trailing row without cells
+SHEET_XML = f"""<worksheet xmlns="{MAIN}"><sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>1</v></c><c r="D1" t="s"><v>1</v></c></row>
+<row r="2"><c r="A2" t="s"><v>2</v></c><c r="B2" t="s"><v>3</v></c><c r="C2" t="s"><v>4</v></c></row>
+<row r="3"><c r="A3" t="inlineStr"><is><t>Astma Actieplan</t></is></c><c r="B3" t="s"><v>5</v></c><c r="D3" t="s"><v>6</v></c></row>
+<row r="4"><c r="A4" t="s"><v>7</v></c><c r="B4" t="s"><v>8</v></c><c r="C4" t="s"><v>9</v></c><c r="D4"/></row>
+<row r="5"><c r="A5" t="s"><v>10</v></c><c r="B5" t="inlineStr"><is><r><t>PDF, </t></r><r><t>Partner Divi</t></r></is></c><c r="C5"><v>12.0</v></c><c r="D5"><v>2.5</v></c></row>
+<row r="6"><c r="A6" t="str"><v>24-uurs urine</v></c><c r="D6" t="s"><v>11</v></c></row>
+<row r="7"/>
+</sheetData></worksheet>"""
+
+def write_workbook(path):
+    shared = ''.join(f'<si><t>{s}</t></si>' for s in SHARED_STRINGS[:3])
+    # A rich-text shared string: the runs join into one value
+    shared += '<si><r><t>K</t></r><r><t>NO</t></r></si>'
+    shared += ''.join(f'<si><t>{s}</t></si>' for s in SHARED_STRINGS[4:])
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('xl/workbook.xml', f'<workbook xmlns="{MAIN}" xmlns:r="{RELS}"><sheets>'
+                                            f'<sheet name="Worksheet" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        archive.writestr('xl/_rels/workbook.xml.rels',
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Type="worksheet" Target="worksheets/sheet1.xml"/></Relationships>')
+        archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{MAIN}">{shared}</sst>')
+        archive.writestr('xl/worksheets/sheet1.xml', SHEET_XML)
+
+class XlsxReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.xlsx_path = os.path.join(self.tmp.name, 'overview.xlsx')
+        self.csv_path = os.path.join(self.tmp.name, 'overview.csv')
+        write_workbook(self.xlsx_path)
+        with open(self.csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+            csv.writer(f).writerows(SHEET_ROWS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rows(self):
+        self.assertEqual(list(iter_xlsx_rows(self.xlsx_path)), [
+            ['Divi', 'Type', 'Type', 'Type'],
+            # Rows end at their last cell; skipped cells come back as ''
+            ['Amandelen knippen', 'KNO', 'Kindergeneeskunde'],
+            ['Astma Actieplan', 'Partner Divi', '', 'Longziekten'],
+            ['Bijsluiter', 'PDF', '-', ''],
+            # Whole numbers as the CSV export writes them
+            ['Samen beslissen', 'PDF, Partner Divi', '12', '2.5'],
+            ['24-uurs urine', '', '', 'Urologie'],
+            [],
+        ])
+
+    def test_overview_matches_csv_export(self):
+        from_xlsx = read_incomplete_overview(self.xlsx_path)
+        from_csv = read_incomplete_overview(self.csv_path)
+        self.assertEqual(from_xlsx, from_csv)
+        partner_divis, pdf_divis, existing_entries = from_xlsx
+        self.assertEqual(partner_divis, {'Astma Actieplan', 'Samen beslissen'})
+        self.assertEqual(pdf_divis, {'Bijsluiter', 'Samen beslissen'})
+        self.assertEqual(existing_entries['Amandelen knippen'], ['KNO', 'Kindergeneeskunde'])
+        self.assertEqual(existing_entries['Samen beslissen'], ['12', '2.5'])
+        self.assertEqual(len(existing_entries), 5)
+
+if __name__ == '__main__':
+    unittest.main()
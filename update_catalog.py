@@ -1,50 +1,26 @@
 import csv
+import os
 import re
 
-# Read the CSV and create a mapping of Divi name to URL
-url_mapping = {}
-with open('Compleet_Overzicht_Divis_v2.csv', 'r', encoding='utf-8-sig') as f:
-    reader = csv.reader(f)
-    next(reader)  # Skip header
-    for row in reader:
-        if row and len(row) >= 12:
-            name = row[0].strip()
-            url = row[-1].strip() if row[-1].strip().startswith('http') else ''
-            if name:
-                url_mapping[name.lower()] = url
-
-print(f"Loaded {len(url_mapping)} URL mappings")
-
-# Read the HTML file
-with open('Divi_Catalogus_Indiveo_Style.html', 'r', encoding='utf-8') as f:
-    html = f.read()
-
-# Function to add link to divi card
-def add_link_to_card(match):
-    full_match = match.group(0)
-    name = match.group(1)
-    display_name = match.group(2)
-    categories = match.group(3)
-
-    # Find URL for this divi
-    url = url_mapping.get(name.lower(), '')
-
-    if url:
-        # Add link wrapper around the card content
-        return full_match.replace(
-            f'<div class="divi-name">{display_name}</div>',
-            f'<a href="{url}" target="_blank" class="divi-link"><div class="divi-name">{display_name}</div></a>'
-        )
-    return full_match
-
-# Pattern to match divi cards
-pattern = r'<div class="divi-card(?:\s+partner)?" data-name="([^"]+)" data-categories="[^"]+">\s*<div class="divi-name">([^<]+)</div>\s*<div class="divi-categories">(.*?)</div>\s*</div>'
-
-# Update cards with links
-html = re.sub(pattern, add_link_to_card, html, flags=re.DOTALL)
+from card_fragments import link_cards, load_card_grid
+from output_writer import atomic_open
+from parse_cache import CACHE_DIR
+
+CATALOG_CSV = 'Compleet_Overzicht_Divis_v2.csv'
+STYLE_PAGE = 'Divi_Catalogus_Indiveo_Style.html'
+GENERATED_PAGE = 'Divi_Catalogus_Interactief.html'
+
+# Data-driven sections of the catalog page, copied over from the generated page
+SYNCED_SECTIONS = [
+    re.compile(r'<select class="category-filter" id="categorySelect">.*?</select>'
+               r'(?:\s*<select class="category-filter" id="sortSelect">.*?</select>)?', re.DOTALL),
+    re.compile(r'<div class="category-tags" id="categoryTags">.*?</div>', re.DOTALL),
+    re.compile(r'<div class="divi-grid" id="diviGrid">.*?</div>\s*(?=<div class="no-results")', re.DOTALL),
+    re.compile(r'<script(?: id="catalogScript")?>\s*const (?:catalogData|searchInput).*?</script>', re.DOTALL),
+]
 
 # Add CSS for links
-link_css = """
+LINK_CSS = """
         .divi-link {
             text-decoration: none;
             color: inherit;
@@ -128,11 +104,50 @@ link_css = """
         }
 """
 
-# Insert CSS before closing </style>
-html = html.replace('    </style>', link_css + '\n    </style>')
+# Styles for the live facet counts of the generated script
+FACET_CSS = """
+        .category-tag.empty {
+            opacity: 0.4;
+        }
+"""
+
+# Styles for the related divis list of the generated script
+RELATED_CSS = """
+        .divi-card[data-related] {
+            cursor: pointer;
+        }
+
+        .divi-card.highlight {
+            box-shadow: 0 0 0 3px var(--color-primary);
+        }
+
+        .divi-related {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 6px;
+            margin-top: 12px;
+        }
+
+        .related-label {
+            width: 100%;
+            font-size: 0.8rem;
+            color: var(--color-text-light);
+        }
+
+        .related-divi {
+            background: var(--color-bg-alt);
+            color: var(--color-primary);
+            border: 1px solid var(--color-border);
+            padding: 4px 10px;
+            border-radius: 12px;
+            font-family: var(--font-body);
+            font-size: 0.8rem;
+            cursor: pointer;
+        }
+"""
 
 # Add credits section before footer
-credits_html = """
+CREDITS_HTML = """
         <div class="credits">
             <div class="credits-title">Over deze catalogus</div>
             <p>Deze interactieve Divi catalogus is gemaakt en wordt beheerd door <strong>Jan Sytze Heegstra</strong> in samenwerking met <strong>Claude Code</strong> (Anthropic AI) als een gratis zijproject en voorbeeld.</p>
@@ -150,14 +165,88 @@ credits_html = """
         <footer>
 """
 
-html = html.replace('<footer>', credits_html)
-
-# Write updated HTML
-with open('Divi_Catalogus_Indiveo_Style.html', 'w', encoding='utf-8') as f:
-    f.write(html)
-
-print("Updated Divi_Catalogus_Indiveo_Style.html with links and credits")
-
-# Count how many links were added
-link_count = html.count('class="divi-link"')
-print(f"Added {link_count} links to divi cards")
+def load_url_mapping(path=CATALOG_CSV):
+    """Read the CSV and create a mapping of Divi name to URL."""
+    url_mapping = {}
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader)  # Skip header
+        for row in reader:
+            if row and len(row) >= 12:
+                name = row[0].strip()
+                url = row[-1].strip() if row[-1].strip().startswith('http') else ''
+                if name:
+                    url_mapping[name.lower()] = url
+    return url_mapping
+
+def sync_sections(html, generated_html):
+    """Replace the options, tags, cards and script with those of the generated page."""
+    for pattern in SYNCED_SECTIONS:
+        source = pattern.search(generated_html)
+        if source:
+            html = pattern.sub(lambda match: source.group(0), html, count=1)
+    return html
+
+def add_links(html, url_mapping, card_grid=None):
+    """Wrap the name of every card that has a URL in a link.
+
+    ``card_grid`` is the generator's fragment cache entry for its cards; when
+    the page holds exactly those cards and every URL agrees, the linked cards
+    are swapped in as a whole instead of being matched one by one.
+    """
+    if (card_grid and card_grid['cards'] in html
+            and all(url_mapping.get(name, '') == url for name, url in card_grid['card_urls'])):
+        return html.replace(card_grid['cards'], card_grid['linked_cards'], 1)
+
+    return link_cards(html, url_mapping)
+
+def add_credits(html):
+    """Insert the link/credits CSS and the credits section once."""
+    if '.divi-link {' not in html:
+        # Insert CSS before closing </style>
+        html = html.replace('    </style>', LINK_CSS + '\n    </style>')
+    if '.category-tag.empty {' not in html:
+        html = html.replace('    </style>', FACET_CSS + '\n    </style>')
+    if '.divi-related {' not in html:
+        html = html.replace('    </style>', RELATED_CSS + '\n    </style>')
+    if '<div class="credits">' not in html:
+        html = html.replace('<footer>', CREDITS_HTML)
+    return html
+
+def update_catalog(csv_path=CATALOG_CSV, html_path=STYLE_PAGE, generated_path=GENERATED_PAGE, cache_dir=CACHE_DIR):
+    """Refresh the Indiveo style catalog page and add divi links and credits.
+
+    The category options, tags, cards and filter script are taken from the
+    freshly generated page when it exists, so both pages share the same data
+    and behaviour; the Indiveo styling around them is kept. The linked cards
+    come from the generator's fragment cache in ``cache_dir`` when it matches.
+    """
+    url_mapping = load_url_mapping(csv_path)
+    print(f"Loaded {len(url_mapping)} URL mappings")
+
+    # Read the HTML file
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    if os.path.exists(generated_path):
+        with open(generated_path, 'r', encoding='utf-8') as f:
+            html = sync_sections(html, f.read())
+        print(f"Synced categories, cards and script from {generated_path}")
+
+    html = add_credits(add_links(html, url_mapping, load_card_grid(cache_dir)))
+
+    # Write updated HTML
+    with atomic_open(html_path, encoding='utf-8') as f:
+        f.write(html)
+
+    return html.count('class="divi-link"')
+
+def main():
+    link_count = update_catalog()
+    print(f"Updated {STYLE_PAGE} with links and credits")
+
+    # Count how many links were added
+    print(f"Added {link_count} links to divi cards")
+
+if __name__ == '__main__':
+    main()
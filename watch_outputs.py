@@ -0,0 +1,127 @@
+import argparse
+import os
+import time
+
+import generate_outputs as gen
+import update_catalog
+from parse_cache import CACHE_DIR
+
+def _generate_html(scraped_divis, partner_divis, category_divis, divi_urls):
+    # Unchanged cards come from the fragment cache, so a rebuild renders only the changed ones
+    gen.generate_html_catalog(scraped_divis, partner_divis, category_divis, divi_urls=divi_urls, cache_dir=CACHE_DIR)
+
+# Output stages: (name, generator, model keys it reads, model key it produces)
+STAGES = [
+    ('overview', gen.generate_completed_overview,
+     ('scraped_divis', 'partner_divis', 'pdf_divis', 'existing_entries'), None),
+    ('overview_v2', gen.generate_completed_overview_v2,
+     ('scraped_divis', 'divi_urls', 'partner_divis', 'pdf_divis', 'existing_entries'), None),
+    ('creative', gen.generate_creative_catalog,
+     ('scraped_divis', 'partner_divis'), 'category_divis'),
+    ('json_export', gen.generate_json_export,
+     ('scraped_divis', 'divi_urls', 'partner_divis', 'pdf_divis', 'existing_entries'), None),
+    ('html', _generate_html,
+     ('scraped_divis', 'partner_divis', 'category_divis', 'divi_urls'), None),
+]
+
+def _signature(path):
+    """Cheap change marker for a file: (mtime, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _parse_inputs(changed_files, workers):
+    """Re-parse only the inputs whose files changed."""
+    parsed = {}
+    if gen.SCRAPE_FILE in changed_files:
+        print("Parsing scraped data...")
+        parsed['scraped_divis'], parsed['divi_urls'] = gen.extract_divis_from_scrape(workers=workers)
+    if gen.default_overview_path() in changed_files:
+        print("Reading incomplete overview...")
+        parsed['partner_divis'], parsed['pdf_divis'], parsed['existing_entries'] = gen.read_incomplete_overview()
+    return parsed
+
+def rebuild(model, changed_files, workers=None):
+    """Update the cached model and re-run the stages that depend on what changed."""
+    changed = set()
+    for key, value in _parse_inputs(changed_files, workers).items():
+        if model.get(key) != value:
+            model[key] = value
+            changed.add(key)
+
+    ran = []
+    for name, generate, inputs, output in STAGES:
+        if not changed.intersection(inputs):
+            continue
+        result = generate(*(model[key] for key in inputs))
+        ran.append(name)
+        if output and model.get(output) != result:
+            model[output] = result
+            changed.add(output)
+
+    # Refresh the Indiveo style page from the new URL overview and generated page
+    if ('overview_v2' in ran or 'html' in ran) and os.path.exists(update_catalog.STYLE_PAGE):
+        link_count = update_catalog.update_catalog()
+        print(f"Linked {link_count} divi cards in {update_catalog.STYLE_PAGE}")
+        ran.append('link')
+
+    return ran
+
+def _try_rebuild(model, changed_files, workers):
+    """rebuild(), but log a failure instead of raising it.
+
+    A half-saved input (a truncated workbook, a partly written export)
+    fails to parse. The model is then cleared, so the next change re-parses
+    every input. Returns the stages that ran, or None on failure.
+    """
+    try:
+        return rebuild(model, changed_files, workers)
+    except Exception as e:
+        model.clear()
+        print(f"Rebuild failed: {type(e).__name__}: {e}")
+        return None
+
+def watch(interval=1.0, workers=None):
+    """Poll the input files and rebuild incrementally until interrupted."""
+    inputs = [gen.SCRAPE_FILE, gen.default_overview_path()]
+    signatures = {path: _signature(path) for path in inputs}
+    model = {}
+
+    _try_rebuild(model, set(inputs), workers)
+    print(f"\nWatching {', '.join(inputs)} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(interval)
+            changed_files = set()
+            for path in inputs:
+                signature = _signature(path)
+                if signature is not None and signature != signatures[path]:
+                    signatures[path] = signature
+                    changed_files.add(path)
+            if not changed_files:
+                continue
+
+            print(f"\nChanged: {', '.join(sorted(changed_files))}")
+            ran = _try_rebuild(model, changed_files if model else set(inputs), workers)
+            if ran is None:
+                print("Waiting for the next change")
+            else:
+                print(f"Rebuilt: {', '.join(ran) if ran else 'nothing (parsed data unchanged)'}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Divi catalog outputs when the inputs change.")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="seconds between checks of the input files")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parse the scrape export in parallel with this many processes")
+    args = parser.parse_args()
+
+    watch(args.interval, args.workers)
+
+if __name__ == '__main__':
+    main()
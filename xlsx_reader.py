@@ -0,0 +1,84 @@
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+def _column_index(ref):
+    """Zero-based column of a cell reference like 'C12'."""
+    letters = CELL_REF.match(ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+def _text_of(elem):
+    """All <t> text below an element (plain and rich-text runs)."""
+    return ''.join(t.text or '' for t in elem.iter(MAIN_NS + 't'))
+
+def _read_shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for event, elem in iterparse(f):
+            if elem.tag == MAIN_NS + 'si':
+                strings.append(_text_of(elem))
+                elem.clear()
+    return strings
+
+def _sheet_path(archive, sheet_index):
+    """Path inside the archive of the n-th worksheet in workbook order."""
+    with archive.open('xl/workbook.xml') as f:
+        sheets = [elem.get(REL_NS + 'id') for event, elem in iterparse(f) if elem.tag == MAIN_NS + 'sheet']
+    with archive.open('xl/_rels/workbook.xml.rels') as f:
+        targets = {elem.get('Id'): elem.get('Target')
+                   for event, elem in iterparse(f) if elem.tag == PACKAGE_REL_NS + 'Relationship'}
+
+    target = targets[sheets[sheet_index]]
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join('xl', target))
+
+def _cell_value(cell, shared_strings):
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return _text_of(cell)
+    value = cell.findtext(MAIN_NS + 'v')
+    if value is None:
+        return ''
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type == 'n':
+        # Render whole numbers the way a CSV export would ("50", not "50.0")
+        number = float(value)
+        return str(int(number)) if number.is_integer() else value
+    return value
+
+def iter_xlsx_rows(path, sheet_index=0):
+    """Yield the rows of a worksheet as lists of strings, one row at a time.
+
+    The sheet XML is parsed incrementally and each row is discarded once
+    yielded, so memory stays flat however long the sheet is. Only the
+    shared string table is held in memory. Missing cells come back as ''.
+    """
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = _read_shared_strings(archive)
+        with archive.open(_sheet_path(archive, sheet_index)) as f:
+            row = []
+            for event, elem in iterparse(f):
+                if elem.tag == MAIN_NS + 'c':
+                    ref = elem.get('r')
+                    column = _column_index(ref) if ref else len(row)
+                    while len(row) < column:
+                        row.append('')
+                    row.append(_cell_value(elem, shared_strings))
+                elif elem.tag == MAIN_NS + 'row':
+                    yield row
+                    row = []
+                    elem.clear()